@@ -0,0 +1,210 @@
+import asyncio
+
+from back_end.automation_workflow.automation_workflow import AutomationWorkflow
+from back_end.automation_workflow.steps.load_input_source_data import main_load_input_source_data_async
+from back_end.automation_workflow.steps.validate_input_data import main_validate_input_data
+from back_end.automation_workflow.steps.check_generation_cache import main_check_generation_cache_async, main_update_generation_cache_async
+from back_end.automation_workflow.steps.generate_content import main_generate_content
+from back_end.automation_workflow.steps.store_output_data import main_store_output_data_async
+from back_end.automation_workflow.steps.upload_output_data import main_upload_output_data_async
+from back_end.automation_workflow.steps.send_email_notification import main_send_email_notifications_async
+from back_end.automation_workflow.steps.generate_daily_report import main_generate_daily_report_async
+from back_end.services.google_service.async_google_service import AsyncGoogleService
+from back_end.services.mongodb_service.async_mongodb_service import AsyncMongoDBService
+from back_end.services.google_service.mail_outbox import MailOutbox
+
+class AsyncAutomationWorkflow(AutomationWorkflow):
+    def __init__(
+        self,
+        google_service: AsyncGoogleService=None,
+        mongodb_service: AsyncMongoDBService=None,
+        temp_folder_path: str=None,
+        mail_outbox: MailOutbox=None
+    ) -> None:
+        """
+        Initialize the asyncio-based Automation Workflow.
+        Many runs can share one event loop (and the same services) without a thread per run.
+        """
+        super().__init__(google_service or AsyncGoogleService(), mongodb_service or AsyncMongoDBService(), temp_folder_path, mail_outbox)
+        self._task = None # Task running the current steps, used for cancellation
+
+    # 1. Load input source data
+    async def _load_input_source_data(self) -> None:
+        # Run task
+        task_result = await main_load_input_source_data_async(self.query_dict, self.google_service)
+
+        # Result
+        if task_result:
+            self.query_dict.update(task_result)
+            await self._run_next_step("validate_input_data")
+        else:
+            self.stop_process(status="Failed", error_message="Failed to load data from Google Sheets")
+
+    # 2. Validate input data
+    async def _validate_input_data(self) -> None:
+        # Run task
+        task_result = await asyncio.to_thread(main_validate_input_data, self.query_dict)
+
+        # Result
+        if task_result:
+            self.query_dict["data"] = task_result
+            await self._run_next_step("check_generation_cache")
+        else:
+            self.stop_process(status="Failed", error_message="Failed to validate input data")
+
+    # 3. Reuse the outputs of unchanged rows
+    async def _check_generation_cache(self) -> None:
+        # Run task (a cache failure only means every row is generated again)
+        self.query_dict["data"] = await main_check_generation_cache_async(self.query_dict, self.mongodb_service)
+
+        # Result
+        await self._run_next_step("generate_content")
+
+    # 4. Generate content
+    async def _generate_content(self) -> None:
+        # Run task
+        task_result = await asyncio.to_thread(main_generate_content, self.query_dict, self.temp_folder_path, self.generation_scheduler)
+
+        # Result
+        if task_result:
+            self.query_dict["data"] = task_result
+            await self._run_next_step("store_output_data")
+        else:
+            self.stop_process(status="Failed", error_message="Failed to generate content")
+
+    # 5. Store output data
+    async def _store_output_data(self) -> None:
+        """
+        Store output data in MongoDB
+        """
+        # Run task
+        await self.mongodb_service.ensure_indexes()
+        task_result = await main_store_output_data_async(self.query_dict, self.mongodb_service)
+
+        # Result
+        if task_result:
+            self.query_dict["data"] = task_result
+            await self._run_next_step("upload_output_data")
+        else:
+            self.stop_process(status="Failed", error_message="Failed to store data to MongoDB")
+
+    # 6. Upload output data
+    async def _upload_output_data(self) -> None:
+        """
+        Store output data to Google Drive
+        """
+        # Run task
+        task_result = await main_upload_output_data_async(self.query_dict, self.google_service)
+
+        # Result
+        if task_result:
+            self.query_dict["data"] = task_result
+            await main_update_generation_cache_async(self.query_dict, self.mongodb_service)
+            self.stop_process(status="Success")
+        else:
+            self.stop_process(status="Failed", error_message="Failed to store data to Google Drive")
+
+    async def _send_email_notifications(self) -> None:
+        """
+        Send email notifications if enabled
+        """
+        # Skip email notifications if not enabled
+        if not self.query_dict.get("send_email_notifications"):
+            return
+        else:
+            # Run task
+            task_result = await main_send_email_notifications_async(self.status, self.query_dict, self.error_message, self.google_service, self.mail_outbox)
+
+            # Result
+            if task_result:
+                await self._run_next_step("generate_daily_report")
+            else:
+                self.stop_process(status_of_optional_steps="Failed", error_message="Failed to send email notifications")
+
+    async def _generate_daily_report(self) -> None:
+        """
+        Generate a daily report.
+        """
+        # Run task
+        task_result = await main_generate_daily_report_async(self.query_dict, self.mongodb_service, self.google_service, self.mail_outbox)
+
+        daily_report = self.query_dict.get("daily_report")
+        if daily_report:
+            self.metrics.record_cache("daily_report", daily_report["cache_hit"], daily_report["render_seconds"])
+
+        # Result
+        if task_result:
+            self.stop_process(status_of_optional_steps="Success")
+        else:
+            self.stop_process(status_of_optional_steps="Failed", error_message="Failed to generate daily report")
+
+    async def process_main_steps(self) -> None:
+        """
+        Process the automation workflow
+        """
+        # Initialize main steps
+        self.status = "In Progress"
+        self.steps = {
+            "load_input_source_data": {"function": self._load_input_source_data, "description": "Load input source data from Google Sheets"},
+            "validate_input_data": {"function": self._validate_input_data, "description": "Validate input data"},
+            "check_generation_cache": {"function": self._check_generation_cache, "description": "Check generation cache"},
+            "generate_content": {"function": self._generate_content, "description": "Generate content by AI models"},
+            "store_output_data": {"function": self._store_output_data, "description": "Store output data in MongoDB"},
+            "upload_output_data": {"function": self._upload_output_data, "description": "Upload output data to Google Drive"},
+        }
+
+        # Start with the first step
+        try:
+            await self._run_cancellable("load_input_source_data")
+        except asyncio.CancelledError:
+            self.stop_process(status="Failed", error_message="Workflow run was cancelled")
+            raise
+
+    async def process_optional_steps(self) -> None:
+        """
+        Process the automation workflow
+        """
+        # Initialize optional steps
+        self.status_of_optional_steps = "In Progress"
+        self.steps = {
+            "send_email_notifications": {"function": self._send_email_notifications, "description": "Send email notifications"},
+            "generate_daily_report": {"function": self._generate_daily_report, "description": "Generate daily report"},
+        }
+
+        # Start with the first step
+        try:
+            await self._run_cancellable("send_email_notifications")
+        except asyncio.CancelledError:
+            self.stop_process(status_of_optional_steps="Failed", error_message="Workflow run was cancelled")
+            raise
+        finally:
+            self.metrics.end_step(len(self.query_dict.get("data", [])))
+            await asyncio.to_thread(self.export_metrics)
+
+    def cancel(self) -> bool:
+        """
+        Cancel the steps currently running, return False if nothing is running
+        """
+        if self._task is None or self._task.done():
+            return False
+        return self._task.cancel()
+
+    async def _run_cancellable(self, first_step_name: str) -> None:
+        """
+        Run the steps in their own task so cancel() can stop them
+        """
+        self._task = asyncio.create_task(self._run_next_step(first_step_name))
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    async def _run_next_step(self, next_step_name: str) -> None:
+        """
+        Run the next step in the workflow
+        """
+        # Update UI status by step description
+        if self.status_callback:
+            self.status_callback(f"Running step: {self.steps[next_step_name]['description']}")
+        self.metrics.start_step(next_step_name, len(self.query_dict.get("data", [])))
+        return await self.steps[next_step_name]["function"]()
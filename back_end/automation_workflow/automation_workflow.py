@@ -1,24 +1,42 @@
 
 import os
+import uuid
 import shutil
+import tempfile
+import logging
 
 from back_end.automation_workflow.steps.generate_daily_report import main_generate_daily_report
-from back_end.automation_workflow.steps.store_output_data import main_store_output_data
-from back_end.services.google_service.google_service import GoogleService
-from back_end.automation_workflow.steps.load_input_source_data import main_load_input_source_data
-from back_end.automation_workflow.steps.upload_output_data import  main_upload_output_data
+from back_end.automation_workflow.steps.store_output_data import main_store_output_data, store_rows
+from back_end.services.google_service.google_service import GoogleService, SHEETS_CHUNK_ROWS
+from back_end.services.google_service.mail_outbox import MailOutbox
+from back_end.automation_workflow.steps.load_input_source_data import main_load_input_source_data, load_input_source_rows
+from back_end.automation_workflow.steps.upload_output_data import  main_upload_output_data, upload_row, new_drive_folder_index
 from back_end.automation_workflow.steps.send_email_notification import main_send_email_notifications
-from back_end.automation_workflow.steps.validate_input_data import main_validate_input_data
-from back_end.automation_workflow.steps.generate_content import main_generate_content
+from back_end.automation_workflow.steps.validate_input_data import main_validate_input_data, validate_row_data, validate_rows_batch
+from back_end.automation_workflow.steps.generate_content import main_generate_content, generate_row_content
+from back_end.automation_workflow.steps.check_generation_cache import main_check_generation_cache, main_update_generation_cache, check_rows_in_generation_cache, save_row_checkpoints
+from back_end.automation_workflow.pipeline import run_pipeline, PipelineError
+from back_end.automation_workflow.steps.shared.row_record import release_row_payload
+from back_end.automation_workflow.instrumentation import RunMetrics, InstrumentedService, export_report
 from back_end.services.mongodb_service.mongodb_service import MongoDBService
+from back_end.services.ai_service.generation_scheduler import GenerationScheduler, GENERATION_BATCH_SIZE
+from back_end.automation_workflow.steps.shared.common import UPLOAD_MAX_WORKERS, MONGODB_INSERT_CHUNK_SIZE, GENERATE_MAX_WORKERS, PIPELINE_QUEUE_SIZE, UPLOAD_CHECKPOINT_INTERVAL, METRICS_JSONL_PATH, METRICS_PROMETHEUS_PATH, DRIVE_FOLDER_INDEX
 
-# Dynamically determine the workspace root and temp folder path
-TEMP_FOLDER_PATH = os.path.join(os.getcwd(), 'back_end', 'automation_workflow', 'steps', 'shared', 'temp_folder')
+# Root of the temp folders, every workflow run gets its own sub folder
+TEMP_FOLDER_PATH = os.path.join(tempfile.gettempdir(), 'automation_workflow')
 
 class AutomationWorkflow:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        google_service: GoogleService=None,
+        mongodb_service: MongoDBService=None,
+        temp_folder_path: str=None,
+        mail_outbox: MailOutbox=None
+    ) -> None:
         """
         Initialize the Automation Workflow
+        Services can be shared between workflow instances, the temp folder must not be.
+        Emails go through the mail outbox when one is given, otherwise they are sent right away.
         """
         # Initialize attributes
         self.steps = []
@@ -26,8 +44,12 @@ class AutomationWorkflow:
         self.status_of_optional_steps = "Not Started" # Not Started, In Progress, (Success or Failed)
         self.error_message = ""
         self.status_callback = None # Callback for status updates
-        self.google_service = GoogleService()
-        self.mongodb_service = MongoDBService()
+        self.metrics = RunMetrics() # Timings of the current run, see report_metrics()
+        self.google_service = InstrumentedService(google_service or GoogleService(), "google", self.metrics)
+        self.mongodb_service = InstrumentedService(mongodb_service or MongoDBService(), "mongodb", self.metrics)
+        self.temp_folder_path = temp_folder_path or new_temp_folder_path()
+        self.generation_scheduler = GenerationScheduler()
+        self.mail_outbox = mail_outbox
 
         # Query dictionary for storing results
         self.query_dict = {}
@@ -43,10 +65,22 @@ class AutomationWorkflow:
             "send_email_notifications": input_fields.get("send_email_notifications", False),
             "email_address": input_fields.get("email_address", ""),
             "generate_daily_report": input_fields.get("generate_daily_report", False),
+            "upload_max_workers": input_fields.get("upload_max_workers", UPLOAD_MAX_WORKERS),
+            "mongodb_chunk_size": input_fields.get("mongodb_chunk_size", MONGODB_INSERT_CHUNK_SIZE),
+            "sheets_chunk_rows": input_fields.get("sheets_chunk_rows", SHEETS_CHUNK_ROWS),
+            "pipelined_execution": input_fields.get("pipelined_execution", False),
+            "generate_max_workers": input_fields.get("generate_max_workers", GENERATE_MAX_WORKERS),
+            "vectorized_validation": input_fields.get("vectorized_validation", False),
+            "in_memory_output": input_fields.get("in_memory_output", False),
+            "drive_folder_index": input_fields.get("drive_folder_index", DRIVE_FOLDER_INDEX),
+            "ai_generation": input_fields.get("ai_generation", False),
+            "metrics_jsonl_path": input_fields.get("metrics_jsonl_path", METRICS_JSONL_PATH),
+            "metrics_prometheus_path": input_fields.get("metrics_prometheus_path", METRICS_PROMETHEUS_PATH),
         }
         
         # Result
         self.query_dict.update(input_fields)
+        self.metrics.reset()
         self.status_callback = status_callback
 
     # 1. Load input source data
@@ -69,14 +103,22 @@ class AutomationWorkflow:
         # Result
         if task_result:
             self.query_dict["data"] = task_result
-            self._run_next_step("generate_content")
+            self._run_next_step("check_generation_cache")
         else:
             self.stop_process(status="Failed", error_message="Failed to validate input data")
 
-    # 3. Generate content
+    # 3. Reuse the outputs of unchanged rows
+    def _check_generation_cache(self) -> None:
+        # Run task (a cache failure only means every row is generated again)
+        self.query_dict["data"] = main_check_generation_cache(self.query_dict, self.mongodb_service)
+
+        # Result
+        self._run_next_step("generate_content")
+
+    # 4. Generate content
     def _generate_content(self) -> None:
         # Run task
-        task_result = main_generate_content(self.query_dict, TEMP_FOLDER_PATH)
+        task_result = main_generate_content(self.query_dict, self.temp_folder_path, self.generation_scheduler)
 
         # Result
         if task_result:
@@ -85,7 +127,7 @@ class AutomationWorkflow:
         else:
             self.stop_process(status="Failed", error_message="Failed to generate content")
 
-    # 4. Store output data
+    # 5. Store output data
     def _store_output_data(self) -> None:
         """
         Store output data in MongoDB
@@ -100,17 +142,18 @@ class AutomationWorkflow:
         else:
             self.stop_process(status="Failed", error_message="Failed to store data to MongoDB")
 
-    # 5. Upload output data
+    # 6. Upload output data
     def _upload_output_data(self) -> None:
         """
         Store output data to Google Drive
         """
         # Run task
-        task_result = main_upload_output_data(self.query_dict, self.google_service)
+        task_result = main_upload_output_data(self.query_dict, self.google_service, self.mongodb_service)
 
         # Result
         if task_result:
             self.query_dict["data"] = task_result
+            main_update_generation_cache(self.query_dict, self.mongodb_service)
             self.stop_process(status="Success")
         else:
             self.stop_process(status="Failed", error_message="Failed to store data to Google Drive")
@@ -124,7 +167,7 @@ class AutomationWorkflow:
             return
         else:
             # Run task
-            task_result = main_send_email_notifications(self.status, self.query_dict, self.error_message, self.google_service)
+            task_result = main_send_email_notifications(self.status, self.query_dict, self.error_message, self.google_service, self.mail_outbox)
                 
             # Result
             if task_result:
@@ -137,8 +180,12 @@ class AutomationWorkflow:
         Generate a daily report.
         """
         # Run task
-        task_result = main_generate_daily_report(self.query_dict, self.mongodb_service, self.google_service)
+        task_result = main_generate_daily_report(self.query_dict, self.mongodb_service, self.google_service, self.mail_outbox)
         
+        daily_report = self.query_dict.get("daily_report")
+        if daily_report:
+            self.metrics.record_cache("daily_report", daily_report["cache_hit"], daily_report["render_seconds"])
+
         # Result
         if task_result:
             self.stop_process(status_of_optional_steps="Success")
@@ -147,13 +194,20 @@ class AutomationWorkflow:
 
     def process_main_steps(self) -> dict:
         """
-        Process the automation workflow
+        Process the automation workflow.
+        Each step of the sequential mode goes over the whole sheet, so every row and its payload are held
+        until the end of the run; the pipelined mode holds the payload of the rows in flight only.
         """
+        # Rows flow through the steps concurrently in pipelined mode
+        if self.query_dict.get("pipelined_execution"):
+            return self._process_main_steps_pipelined()
+
         # Initialize main steps
         self.status = "In Progress"
         self.steps = {
             "load_input_source_data": {"function": self._load_input_source_data, "description": "Load input source data from Google Sheets"},
             "validate_input_data": {"function": self._validate_input_data, "description": "Validate input data"},
+            "check_generation_cache": {"function": self._check_generation_cache, "description": "Check generation cache"},
             "generate_content": {"function": self._generate_content, "description": "Generate content by AI models"},
             "store_output_data": {"function": self._store_output_data, "description": "Store output data in MongoDB"},
             "upload_output_data": {"function": self._upload_output_data, "description": "Upload output data to Google Drive"},
@@ -162,6 +216,125 @@ class AutomationWorkflow:
         # Start with the first step
         self._run_next_step("load_input_source_data")
 
+    def _process_main_steps_pipelined(self) -> None:
+        """
+        Process the main steps as a pipeline: rows stream through bounded queues and every step
+        runs with its own concurrency, so early rows are uploaded while later rows are generated.
+        Rows leave the pipeline without their payload, the run keeps their status for the summary steps.
+        """
+        self.status = "In Progress"
+        google_drive_folder_url = self.query_dict.get("google_drive_folder_url")
+        os.makedirs(self.temp_folder_path, exist_ok=True)
+
+        # Row-level functions of each step, called with a batch of (index, row) items
+        seen_values = {} # Duplicate index shared by every batch of the run
+        def validate_rows(items):
+            if self.query_dict.get("vectorized_validation"):
+                validate_rows_batch([row for _, row in items], [idx for idx, _ in items], seen_values)
+            else:
+                for idx, row in items:
+                    validate_row_data(idx, row, seen_values)
+
+        def check_cached_rows(items):
+            try:
+                check_rows_in_generation_cache([row for _, row in items], self.query_dict, self.mongodb_service)
+            except Exception as e:
+                logging.error(f"Error checking generation cache: {e}")
+
+        def generate_rows(items):
+            if self.query_dict.get("ai_generation"):
+                self.generation_scheduler.generate_rows([row for _, row in items])
+            for idx, row in items:
+                generate_row_content(idx, row, self.temp_folder_path, self.query_dict.get("in_memory_output", False))
+
+        def store_output_rows(items):
+            store_rows([row for _, row in items], self.mongodb_service)
+
+        folder_index = new_drive_folder_index(self.query_dict, self.google_service)
+        def upload_rows(items):
+            for _, row in items:
+                row["google_drive_uploaded_file"] = upload_row(row, google_drive_folder_url, self.google_service, folder_index)
+
+        def checkpoint_rows(items):
+            save_row_checkpoints([row for _, row in items], self.mongodb_service)
+            for _, row in items:
+                release_row_payload(row)
+
+        self.steps = {
+            "validate_input_data": {
+                "function": validate_rows,
+                "description": "Validate input data",
+                "error_message": "Failed to validate input data",
+                "batch_size": self.query_dict.get("mongodb_chunk_size") or MONGODB_INSERT_CHUNK_SIZE,
+            },
+            "check_generation_cache": {
+                "function": check_cached_rows,
+                "description": "Check generation cache",
+                "error_message": "Failed to check generation cache",
+                "batch_size": self.query_dict.get("mongodb_chunk_size") or MONGODB_INSERT_CHUNK_SIZE,
+            },
+            "generate_content": {
+                "function": generate_rows,
+                "description": "Generate content by AI models",
+                "error_message": "Failed to generate content",
+                "workers": self.query_dict.get("generate_max_workers") or GENERATE_MAX_WORKERS,
+                "batch_size": GENERATION_BATCH_SIZE,
+            },
+            "store_output_data": {
+                "function": store_output_rows,
+                "description": "Store output data in MongoDB",
+                "error_message": "Failed to store data to MongoDB",
+                "batch_size": self.query_dict.get("mongodb_chunk_size") or MONGODB_INSERT_CHUNK_SIZE,
+            },
+            "upload_output_data": {
+                "function": upload_rows,
+                "description": "Upload output data to Google Drive",
+                "error_message": "Failed to store data to Google Drive",
+                "workers": self.query_dict.get("upload_max_workers") or UPLOAD_MAX_WORKERS,
+            },
+            "save_row_checkpoints": {
+                "function": checkpoint_rows,
+                "description": "Save row checkpoints",
+                "error_message": "Failed to save row checkpoints",
+                "batch_size": UPLOAD_CHECKPOINT_INTERVAL,
+            },
+        }
+        for step_name, step in self.steps.items():
+            step["function"] = self.metrics.time_stage(step_name, step["function"])
+
+        # 1. Load input source data lazily, the rows are read while the pipeline runs
+        if self.status_callback:
+            self.status_callback("Running step: Load input source data from Google Sheets")
+        self.metrics.start_step("load_input_source_data")
+        try:
+            task_result = load_input_source_rows(self.query_dict, self.google_service)
+        except Exception as e:
+            logging.error(f"Error loading input source data: {e}")
+            return self.stop_process(status="Failed", error_message="Failed to load data from Google Sheets")
+        self.query_dict.update({k: v for k, v in task_result.items() if k != "data"})
+        # The step goes on while the pipeline reads the rows, it ends when they are exhausted
+        self.metrics.end_step()
+        source = self.metrics.time_source("load_input_source_data", iter(task_result["data"]))
+
+        # 2. Stream the rows through the remaining steps
+        try:
+            rows = run_pipeline(source, self.steps, PIPELINE_QUEUE_SIZE, self.status_callback)
+        except PipelineError as e:
+            logging.error(f"Error in pipelined workflow: {e}")
+            error_message = self.steps.get(e.stage_name, {}).get("error_message", "Failed to load data from Google Sheets")
+            return self.stop_process(status="Failed", error_message=error_message)
+
+        # Result
+        if folder_index:
+            self.query_dict["drive_uploads"] = dict(folder_index.counts)
+        if rows:
+            self.query_dict["data"] = rows
+            self.metrics.start_step("update_generation_cache")
+            main_update_generation_cache(self.query_dict, self.mongodb_service)
+            self.stop_process(status="Success")
+        else:
+            self.stop_process(status="Failed", error_message="Failed to load data from Google Sheets")
+
     def process_optional_steps(self) -> dict:
         """
         Process the automation workflow
@@ -175,6 +348,27 @@ class AutomationWorkflow:
         
         # Start with the first step
         self._run_next_step("send_email_notifications")
+        self.metrics.end_step(len(self.query_dict.get("data", [])))
+        self.export_metrics()
+
+    def report_metrics(self) -> dict:
+        """
+        Return the timings of the current run: wall time, rows, rows/sec, external calls and bytes uploaded per step
+        """
+        return self.metrics.report()
+
+    def export_metrics(self) -> None:
+        """
+        Export the run report to the configured JSON lines and Prometheus files
+        """
+        try:
+            export_report(
+                self.metrics.report(),
+                self.query_dict.get("metrics_jsonl_path"),
+                self.query_dict.get("metrics_prometheus_path")
+            )
+        except Exception as e:
+            logging.error(f"Error exporting run metrics: {e}")
 
     def _run_next_step(self, next_step_name: str) -> None:
         """
@@ -183,6 +377,7 @@ class AutomationWorkflow:
         # Update UI status by step description
         if self.status_callback:
             self.status_callback(f"Running step: {self.steps[next_step_name]['description']}")
+        self.metrics.start_step(next_step_name, len(self.query_dict.get("data", [])))
         return self.steps[next_step_name]["function"]()
 
     def stop_process(
@@ -198,6 +393,7 @@ class AutomationWorkflow:
         self.status = status or self.status
         self.status_of_optional_steps = status_of_optional_steps or self.status_of_optional_steps
         self.error_message = error_message
+        self.metrics.end_step(len(self.query_dict.get("data", [])))
 
     def reset_resources(self) -> None:
         """
@@ -212,8 +408,14 @@ class AutomationWorkflow:
 
     def _clear_temp_folder(self):
         """
-        Remove all files in the temp folder (TEMP_FOLDER_PATH)
+        Remove the temp folder of this workflow, it is created again by the next run
         """
-        if os.path.exists(TEMP_FOLDER_PATH):
-            shutil.rmtree(TEMP_FOLDER_PATH)
-        os.makedirs(TEMP_FOLDER_PATH, exist_ok=True)
\ No newline at end of file
+        if os.path.exists(self.temp_folder_path):
+            shutil.rmtree(self.temp_folder_path)
+
+
+def new_temp_folder_path() -> str:
+    """
+    Return a temp folder path unique to one workflow instance, so concurrent runs never clobber each other
+    """
+    return os.path.join(TEMP_FOLDER_PATH, uuid.uuid4().hex)
\ No newline at end of file
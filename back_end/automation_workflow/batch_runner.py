@@ -0,0 +1,147 @@
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from back_end.automation_workflow.automation_workflow import AutomationWorkflow
+from back_end.services.google_service.google_service import GoogleService, google_rate_limits
+from back_end.services.google_service.drive_folder_index import drive_folder_id
+from back_end.services.google_service.mail_outbox import MailOutbox, get_mail_outbox
+from back_end.services.mongodb_service.mongodb_service import MongoDBService
+
+# Requests per second allowed for each Google API across all runs of the batch
+GOOGLE_API_RATE_LIMITS = {
+    "sheets": 1,
+    "drive": 10,
+    "gmail": 2,
+}
+BATCH_MAX_WORKERS = 4
+
+def load_manifest(manifest_path: str) -> list:
+    """
+    Load a JSON manifest: a list of workflow input fields, each with at least
+    "google_sheets_url" and "google_drive_folder_url"
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    # Keep only the entries that can be processed
+    jobs = []
+    for idx, entry in enumerate(manifest):
+        if entry.get("google_sheets_url") and entry.get("google_drive_folder_url"):
+            jobs.append(entry)
+        else:
+            logging.error(f"Skipping manifest entry {idx}: google_sheets_url and google_drive_folder_url are required")
+    return jobs
+
+def run_batch(jobs: list, max_workers: int = BATCH_MAX_WORKERS, rate_limits: dict = GOOGLE_API_RATE_LIMITS) -> dict:
+    """
+    Run one isolated AutomationWorkflow per job on a thread pool and summarize the results.
+    The Google and MongoDB services, the per-API rate limits and the mail outbox are shared by all runs:
+    a recipient gets one digest for all the runs of the batch.
+    Jobs writing to the same Drive folder run one after the other, so each one sees the files of the previous.
+    The rate limits only apply during the batch, the previous limits of the process are restored afterwards.
+    """
+    google_service = GoogleService()
+    mongodb_service = MongoDBService()
+    mail_outbox = get_mail_outbox(google_service)
+
+    jobs_by_folder = {}
+    for idx, job in enumerate(jobs):
+        jobs_by_folder.setdefault(drive_folder_id(job.get("google_drive_folder_url")), []).append((idx, job))
+    results = [None] * len(jobs)
+
+    def run_folder_jobs(folder_jobs):
+        for idx, job in folder_jobs:
+            results[idx] = _run_job(idx, job, google_service, mongodb_service, mail_outbox)
+
+    started_at = time.perf_counter()
+    with google_rate_limits(rate_limits):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(run_folder_jobs, jobs_by_folder.values()))
+        mail_delivery = mail_outbox.flush(force=True)
+
+    return {
+        "total_runs": len(results),
+        "successful_runs": sum(1 for result in results if result["status"] == "Success"),
+        "failed_runs": sum(1 for result in results if result["status"] != "Success"),
+        "total_rows": sum(result["rows"] for result in results),
+        "uploaded_files": sum(result["uploaded_files"] for result in results),
+        "generation_cache": {
+            "hits": sum(result["generation_cache"].get("hits", 0) for result in results),
+            "misses": sum(result["generation_cache"].get("misses", 0) for result in results),
+        },
+        "drive_uploads": {
+            action: sum(result["drive_uploads"].get(action, 0) for result in results)
+            for action in ("skipped", "updated", "created")
+        },
+        "mail_delivery": mail_delivery,
+        "duration_seconds": round(time.perf_counter() - started_at, 3),
+        "runs": results,
+    }
+
+def _run_job(idx: int, job: dict, google_service: GoogleService, mongodb_service: MongoDBService, mail_outbox: MailOutbox = None) -> dict:
+    """
+    Run the workflow for one manifest entry, every workflow instance has its own temp folder
+    """
+    automation_workflow = AutomationWorkflow(google_service, mongodb_service, mail_outbox=mail_outbox)
+    started_at = time.perf_counter()
+    try:
+        automation_workflow.load_input_data(job, lambda message: logging.info(f"[{idx}] {message}"))
+        automation_workflow.process_main_steps()
+        automation_workflow.process_optional_steps()
+
+        rows = automation_workflow.query_dict.get("data", [])
+        return {
+            "google_sheets_url": job.get("google_sheets_url"),
+            "status": automation_workflow.status,
+            "status_of_optional_steps": automation_workflow.status_of_optional_steps,
+            "error_message": automation_workflow.error_message or "",
+            "rows": len(rows),
+            "uploaded_files": sum(1 for row in rows if row.get("google_drive_uploaded_file")),
+            "generation_cache": automation_workflow.query_dict.get("generation_cache", {"hits": 0, "misses": 0}),
+            "drive_uploads": automation_workflow.query_dict.get("drive_uploads", {}),
+            "duration_seconds": round(time.perf_counter() - started_at, 3),
+            "metrics": automation_workflow.report_metrics(),
+        }
+    except Exception as e:
+        logging.error(f"Error in batch run {idx}: {e}")
+        return {
+            "google_sheets_url": job.get("google_sheets_url"),
+            "status": "Failed",
+            "status_of_optional_steps": automation_workflow.status_of_optional_steps,
+            "error_message": str(e),
+            "rows": 0,
+            "uploaded_files": 0,
+            "generation_cache": {"hits": 0, "misses": 0},
+            "drive_uploads": {},
+            "duration_seconds": round(time.perf_counter() - started_at, 3),
+            "metrics": automation_workflow.report_metrics(),
+        }
+    finally:
+        automation_workflow.reset_resources()
+
+def main() -> None:
+    """
+    Headless entry point.
+    Usage: python -m back_end.automation_workflow.batch_runner manifest.json [--workers N] [--output summary.json]
+    """
+    parser = argparse.ArgumentParser(description="Run the automation workflow for every sheet of a manifest")
+    parser.add_argument("manifest", help="JSON file with a list of workflow input fields")
+    parser.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS, help="Number of workflow runs processed concurrently")
+    parser.add_argument("--output", help="Write the JSON summary to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    summary = run_batch(load_manifest(args.manifest), max_workers=args.workers)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=4)
+    else:
+        print(json.dumps(summary, indent=4))
+    raise SystemExit(0 if summary["failed_runs"] == 0 else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import logging
+import datetime
+import threading
+
+from back_end.automation_workflow.steps.generate_daily_report import daily_report_window, get_or_render_daily_report
+from back_end.automation_workflow.steps.shared.daily_report_cache import DailyReportCache, get_daily_report_cache
+from back_end.services.mongodb_service.mongodb_service import MongoDBService
+
+# Local time (HH:MM) at which the daily report is rendered ahead of the runs, disabled when empty
+DAILY_REPORT_PRECOMPUTE_AT = os.getenv("DAILY_REPORT_PRECOMPUTE_AT", "")
+
+class DailyReportScheduler:
+    """
+    Background thread rendering the daily report into the report cache every day at a fixed time,
+    so the first run of the day only attaches it
+    """
+    def __init__(self, mongodb_service: MongoDBService, precompute_at: str = DAILY_REPORT_PRECOMPUTE_AT, report_cache: DailyReportCache = None) -> None:
+        self.mongodb_service = mongodb_service
+        self.precompute_at = datetime.time.fromisoformat(precompute_at)
+        self.report_cache = report_cache or get_daily_report_cache()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self) -> None:
+        """
+        Start the background precomputes
+        """
+        self.thread = threading.Thread(target=self._work, name="daily_report_scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background precomputes
+        """
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def precompute(self) -> bool:
+        """
+        Render the report of the current window unless the cached one is up to date, return whether it was rendered
+        """
+        window = daily_report_window()
+        daily_counts = self.mongodb_service.find_daily_counters(window[0], window[1])
+        report, cache_hit = get_or_render_daily_report(window, daily_counts, self.report_cache, count_lookup=False)
+        if not cache_hit:
+            logging.info(f"Daily report precomputed in {report['render_seconds']:.3f}s")
+        return not cache_hit
+
+    def seconds_until_next_run(self, now: datetime.datetime = None) -> float:
+        """
+        Return the seconds until the next precompute time
+        """
+        now = now or datetime.datetime.now()
+        next_run = datetime.datetime.combine(now.date(), self.precompute_at)
+        if next_run <= now:
+            next_run += datetime.timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    def _work(self) -> None:
+        """
+        Precompute the report every day until the scheduler is stopped
+        """
+        while not self.stop_event.wait(self.seconds_until_next_run()):
+            try:
+                self.precompute()
+            except Exception as e:
+                logging.error(f"Error precomputing the daily report: {e}")
@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import uuid
+import inspect
+import datetime
+import threading
+import contextvars
+
+# Step of the current thread or task, set by the pipelined stages which run steps concurrently
+_CURRENT_STEP = contextvars.ContextVar("current_step", default=None)
+
+# Bytes sent by the upload methods, read from their positional arguments
+UPLOAD_SIZE_GETTERS = {
+    "store_data_to_drive": lambda args: os.path.getsize(args[0]) if args and os.path.exists(args[0]) else 0,
+    "store_bytes_to_drive": lambda args: len(args[1]) if len(args) > 1 else 0,
+}
+PROMETHEUS_PREFIX = "automation_workflow"
+_SOURCE_EXHAUSTED = object() # Sentinel returned by next() on the pipeline source
+
+class RunMetrics:
+    """
+    Thread-safe timings of one workflow run: wall time, rows and rows/sec per step,
+    plus the count, latency and errors of every external call, the bytes uploaded
+    and the hits, misses and build time of the caches.
+    """
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Start a new run
+        """
+        with self.lock:
+            self.run_id = uuid.uuid4().hex
+            self.started_at = datetime.datetime.now(datetime.timezone.utc)
+            self.steps = {} # step name -> step metrics, in execution order
+            self.current_step = None # Step of the sequential chain
+            self.caches = {} # cache name -> lookups
+
+    def start_step(self, step_name: str, rows: int = None) -> None:
+        """
+        Close the current step of the sequential chain and open the next one
+        """
+        self.end_step(rows)
+        with self.lock:
+            self._get_step(step_name)["started_at"] = time.perf_counter()
+            self.current_step = step_name
+
+    def end_step(self, rows: int = None) -> None:
+        """
+        Close the current step of the sequential chain with the number of rows it produced
+        """
+        with self.lock:
+            if self.current_step is None:
+                return
+            step = self.steps[self.current_step]
+            step["finished_at"] = time.perf_counter()
+            step["busy_seconds"] += step["finished_at"] - step["started_at"]
+            step["rows"] += rows or 0
+            self.current_step = None
+
+    def time_stage(self, step_name: str, function):
+        """
+        Wrap a pipeline stage function so every batch it processes is timed and counted
+        """
+        def timed_stage(items):
+            token = _CURRENT_STEP.set(step_name)
+            started_at = time.perf_counter()
+            try:
+                return function(items)
+            finally:
+                finished_at = time.perf_counter()
+                _CURRENT_STEP.reset(token)
+                with self.lock:
+                    step = self._get_step(step_name)
+                    step["started_at"] = min(step["started_at"] or started_at, started_at)
+                    step["finished_at"] = max(step["finished_at"] or finished_at, finished_at)
+                    step["busy_seconds"] += finished_at - started_at
+                    step["rows"] += len(items)
+        return timed_stage
+
+    def time_source(self, step_name: str, rows):
+        """
+        Wrap a pipeline source iterable so the time spent reading it is timed and counted,
+        the step ends when the source is exhausted
+        """
+        while True:
+            token = _CURRENT_STEP.set(step_name)
+            started_at = time.perf_counter()
+            try:
+                row = next(rows, _SOURCE_EXHAUSTED)
+            finally:
+                finished_at = time.perf_counter()
+                _CURRENT_STEP.reset(token)
+                with self.lock:
+                    step = self._get_step(step_name)
+                    step["started_at"] = min(step["started_at"] or started_at, started_at)
+                    step["finished_at"] = max(step["finished_at"] or finished_at, finished_at)
+                    step["busy_seconds"] += finished_at - started_at
+            if row is _SOURCE_EXHAUSTED:
+                return
+            with self.lock:
+                step["rows"] += 1
+            yield row
+
+    def record_call(self, call_name: str, seconds: float, error: bool = False, uploaded_bytes: int = 0) -> None:
+        """
+        Record one external call on the step running it
+        """
+        with self.lock:
+            step = self._get_step(_CURRENT_STEP.get() or self.current_step or "unattributed")
+            call = step["calls"].setdefault(call_name, {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            call["count"] += 1
+            call["errors"] += 1 if error else 0
+            call["total_seconds"] += seconds
+            call["max_seconds"] = max(call["max_seconds"], seconds)
+            step["uploaded_bytes"] += uploaded_bytes
+
+    def record_cache(self, cache_name: str, hit: bool, build_seconds: float = 0.0) -> None:
+        """
+        Record one cache lookup, with the time spent building the value on a miss
+        """
+        with self.lock:
+            cache = self.caches.setdefault(cache_name, {"hits": 0, "misses": 0, "build_seconds": 0.0})
+            cache["hits" if hit else "misses"] += 1
+            cache["build_seconds"] += 0.0 if hit else build_seconds
+
+    def report(self) -> dict:
+        """
+        Return the machine-readable summary of the run
+        """
+        with self.lock:
+            started_at = [step["started_at"] for step in self.steps.values() if step["started_at"] is not None]
+            finished_at = [step["finished_at"] or step["started_at"] for step in self.steps.values() if step["started_at"] is not None]
+            steps = {}
+            for step_name, step in self.steps.items():
+                wall_seconds = (step["finished_at"] or step["started_at"] or 0) - (step["started_at"] or 0)
+                steps[step_name] = {
+                    "wall_seconds": round(wall_seconds, 6),
+                    "busy_seconds": round(step["busy_seconds"], 6),
+                    "rows": step["rows"],
+                    "rows_per_second": round(step["rows"] / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+                    "uploaded_bytes": step["uploaded_bytes"],
+                    "calls": {
+                        call_name: {
+                            "count": call["count"],
+                            "errors": call["errors"],
+                            "total_seconds": round(call["total_seconds"], 6),
+                            "mean_seconds": round(call["total_seconds"] / call["count"], 6),
+                            "max_seconds": round(call["max_seconds"], 6),
+                        }
+                        for call_name, call in step["calls"].items()
+                    },
+                }
+            return {
+                "run_id": self.run_id,
+                "started_at": self.started_at.isoformat(),
+                # Wall time of the run, the pipelined steps overlap
+                "total_seconds": round(max(finished_at) - min(started_at), 6) if started_at else 0.0,
+                "uploaded_bytes": sum(step["uploaded_bytes"] for step in steps.values()),
+                "steps": steps,
+                "caches": {
+                    cache_name: {
+                        "hits": cache["hits"],
+                        "misses": cache["misses"],
+                        "hit_rate": round(cache["hits"] / (cache["hits"] + cache["misses"]), 3),
+                        "build_seconds": round(cache["build_seconds"], 6),
+                    }
+                    for cache_name, cache in self.caches.items()
+                },
+            }
+
+    def _get_step(self, step_name: str) -> dict:
+        # Callers hold self.lock
+        if step_name not in self.steps:
+            self.steps[step_name] = {"started_at": None, "finished_at": None, "busy_seconds": 0.0, "rows": 0, "uploaded_bytes": 0, "calls": {}}
+        return self.steps[step_name]
+
+class InstrumentedService:
+    """
+    Proxy of a service that records every public method call in a RunMetrics.
+    Sync, async and generator methods are supported, other attributes are passed through.
+    """
+    def __init__(self, service, service_name: str, metrics: RunMetrics) -> None:
+        self.service = service
+        self.service_name = service_name
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        attribute = getattr(self.service, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        call_name = f"{self.service_name}.{name}"
+        size_getter = UPLOAD_SIZE_GETTERS.get(name)
+        metrics = self.metrics
+
+        if inspect.iscoroutinefunction(attribute):
+            async def timed_async_call(*args, **kwargs):
+                started_at = time.perf_counter()
+                try:
+                    result = await attribute(*args, **kwargs)
+                except Exception:
+                    metrics.record_call(call_name, time.perf_counter() - started_at, error=True)
+                    raise
+                metrics.record_call(call_name, time.perf_counter() - started_at, uploaded_bytes=size_getter(args) if size_getter else 0)
+                return result
+            return timed_async_call
+
+        def timed_call(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception:
+                metrics.record_call(call_name, time.perf_counter() - started_at, error=True)
+                raise
+            if inspect.isgenerator(result):
+                return _timed_generator(result, call_name, metrics, time.perf_counter() - started_at)
+            metrics.record_call(call_name, time.perf_counter() - started_at, uploaded_bytes=size_getter(args) if size_getter else 0)
+            return result
+        return timed_call
+
+def _timed_generator(generator, call_name: str, metrics: RunMetrics, seconds: float):
+    """
+    Yield from a generator, recording the time spent inside it as one call once it is exhausted
+    """
+    error = False
+    try:
+        while True:
+            started_at = time.perf_counter()
+            try:
+                item = next(generator)
+            except StopIteration:
+                seconds += time.perf_counter() - started_at
+                return
+            seconds += time.perf_counter() - started_at
+            yield item
+    except Exception:
+        error = True
+        raise
+    finally:
+        metrics.record_call(call_name, seconds, error=error)
+
+def to_prometheus(report: dict) -> str:
+    """
+    Format a run report in the Prometheus text exposition format
+    """
+    samples = {
+        "step_wall_seconds": [],
+        "step_rows": [],
+        "step_rows_per_second": [],
+        "step_uploaded_bytes": [],
+        "external_calls_total": [],
+        "external_call_errors_total": [],
+        "external_call_seconds_total": [],
+        "external_call_max_seconds": [],
+        "cache_hits_total": [],
+        "cache_misses_total": [],
+        "cache_build_seconds_total": [],
+    }
+    for step_name, step in report["steps"].items():
+        labels = f'run_id="{report["run_id"]}",step="{step_name}"'
+        samples["step_wall_seconds"].append((labels, step["wall_seconds"]))
+        samples["step_rows"].append((labels, step["rows"]))
+        samples["step_rows_per_second"].append((labels, step["rows_per_second"]))
+        samples["step_uploaded_bytes"].append((labels, step["uploaded_bytes"]))
+        for call_name, call in step["calls"].items():
+            call_labels = f'{labels},call="{call_name}"'
+            samples["external_calls_total"].append((call_labels, call["count"]))
+            samples["external_call_errors_total"].append((call_labels, call["errors"]))
+            samples["external_call_seconds_total"].append((call_labels, call["total_seconds"]))
+            samples["external_call_max_seconds"].append((call_labels, call["max_seconds"]))
+    for cache_name, cache in report.get("caches", {}).items():
+        labels = f'run_id="{report["run_id"]}",cache="{cache_name}"'
+        samples["cache_hits_total"].append((labels, cache["hits"]))
+        samples["cache_misses_total"].append((labels, cache["misses"]))
+        samples["cache_build_seconds_total"].append((labels, cache["build_seconds"]))
+
+    lines = []
+    for metric_name, metric_samples in samples.items():
+        metric_type = "counter" if metric_name.endswith("_total") else "gauge"
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{metric_name} {metric_type}")
+        lines.extend(f"{PROMETHEUS_PREFIX}_{metric_name}{{{labels}}} {value}" for labels, value in metric_samples)
+    return "\n".join(lines) + "\n"
+
+def export_report(report: dict, jsonl_path: str = None, prometheus_path: str = None) -> None:
+    """
+    Append the report to a JSON lines file and/or write it as a Prometheus textfile
+    """
+    if jsonl_path:
+        with open(jsonl_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report) + "\n")
+    if prometheus_path:
+        # Write then rename so a scraper never reads a partial file
+        temp_path = f"{prometheus_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(to_prometheus(report))
+        os.replace(temp_path, prometheus_path)
@@ -0,0 +1,411 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from back_end.automation_workflow.automation_workflow import AutomationWorkflow
+from back_end.automation_workflow.daily_report_scheduler import DailyReportScheduler, DAILY_REPORT_PRECOMPUTE_AT
+from back_end.services.google_service.google_service import GoogleService
+from back_end.services.google_service.drive_folder_index import drive_folder_id
+from back_end.services.google_service.mail_outbox import MailOutbox, get_mail_outbox
+from back_end.services.mongodb_service.mongodb_service import MongoDBService, MONGODB_URI
+from back_end.services.mongodb_service.mongodb_client import warm_up_mongodb_client
+
+# Jobs survive a restart of the UI process, interrupted jobs are queued again and resume from their checkpoints
+JOB_QUEUE_SQLITE_PATH = os.getenv("JOB_QUEUE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "automation_workflow_jobs.sqlite"))
+JOB_WORKERS = 4
+JOB_POLL_SECONDS = 0.5
+JOB_HEARTBEAT_SECONDS = 10 # Running jobs are marked alive by their process this often
+JOB_STALE_SECONDS = 60 # Running jobs without heartbeat for this long are considered interrupted
+JOB_RETENTION_SECONDS = 7 * 24 * 60 * 60
+FINISHED_JOB_STATUSES = ["Success", "Failed"]
+ROW_STATUS_COLUMNS = ["File Name", "Valid", "Generation", "Stored", "Uploaded", "Reused", "Message"]
+
+_WORKER_POOL = None
+_WORKER_POOL_LOCK = threading.Lock()
+
+class JobQueue:
+    """
+    Workflow runs queued in a SQLite file, with their progress and per-row status.
+    Job status: Queued, Running, (Success or Failed).
+    The per-row status is kept in job_rows, one record per row, so a run only writes the rows that changed
+    and the UI reads a page of rows and the row_counts summary instead of the whole sheet.
+    Several processes can share the file: a running job records its owner and a heartbeat,
+    and only the jobs whose heartbeat stopped are queued again.
+    Jobs writing to the same Drive folder are not run at the same time, see DriveFolderIndex.
+    """
+    def __init__(self, path: str = JOB_QUEUE_SQLITE_PATH):
+        self.lock = threading.Lock()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}" # Unique per queue instance
+        # Autocommit mode, multi-statement writes use an explicit transaction
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                input_fields TEXT,
+                drive_folder TEXT,
+                status TEXT,
+                status_of_optional_steps TEXT,
+                message TEXT,
+                error_message TEXT,
+                row_counts TEXT,
+                metrics TEXT,
+                created_at REAL,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT,
+                heartbeat_at REAL
+            )
+        """)
+        self._add_missing_columns("jobs", {"drive_folder": "TEXT", "row_counts": "TEXT", "owner": "TEXT", "heartbeat_at": "REAL"})
+        self.connection.execute("CREATE INDEX IF NOT EXISTS jobs_status_created_at ON jobs (status, created_at)")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS job_rows (
+                job_id TEXT,
+                row_index INTEGER,
+                status TEXT,
+                PRIMARY KEY (job_id, row_index)
+            ) WITHOUT ROWID
+        """)
+
+    def submit(self, input_fields: dict) -> str:
+        """
+        Queue a workflow run, return its job id
+        """
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO jobs (id, input_fields, drive_folder, status, status_of_optional_steps, message, error_message, row_counts, metrics, created_at) "
+                "VALUES (?, ?, ?, 'Queued', 'Not Started', 'Waiting for a worker', '', '{}', '{}', ?)",
+                (job_id, json.dumps(input_fields), drive_folder_id(input_fields.get("google_drive_folder_url")) or None, time.time())
+            )
+        return job_id
+
+    def claim(self):
+        """
+        Mark the oldest queued job as Running, return (job_id, input_fields) or None if the queue is empty.
+        A job waits while another job writing to the same Drive folder is running.
+        """
+        with self._transaction():
+            job = self.connection.execute(
+                "SELECT id, input_fields FROM jobs WHERE status = 'Queued' AND (drive_folder IS NULL OR drive_folder NOT IN ("
+                "SELECT drive_folder FROM jobs WHERE status = 'Running' AND drive_folder IS NOT NULL"
+                ")) ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if job:
+                now = time.time()
+                self.connection.execute(
+                    "UPDATE jobs SET status = 'Running', message = 'Starting', started_at = ?, owner = ?, heartbeat_at = ? WHERE id = ?",
+                    (now, self.owner, now, job["id"])
+                )
+                # An interrupted run starts over, its rows are written again
+                self.connection.execute("DELETE FROM job_rows WHERE job_id = ?", (job["id"],))
+        return (job["id"], json.loads(job["input_fields"])) if job else None
+
+    def update(self, job_id: str, **fields) -> None:
+        """
+        Update columns of a job, row_counts and metrics are stored as JSON
+        """
+        for name in ("row_counts", "metrics"):
+            if name in fields:
+                fields[name] = json.dumps(fields[name], default=str)
+        if fields.get("status") in FINISHED_JOB_STATUSES:
+            fields["finished_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self.lock:
+            self.connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str) -> dict:
+        """
+        Return a job as a dict, or {} if it does not exist
+        """
+        with self.lock:
+            job = self.connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None:
+            return {}
+        job = dict(job)
+        job["input_fields"] = json.loads(job["input_fields"])
+        job["row_counts"] = json.loads(job["row_counts"] or "{}")
+        job["metrics"] = json.loads(job["metrics"])
+        return job
+
+    def update_rows(self, job_id: str, row_statuses: dict) -> None:
+        """
+        Write the status of the given rows of a job, from {row index: status dict}
+        """
+        if not row_statuses:
+            return
+        # One transaction for the whole batch, autocommit would commit every row
+        with self._transaction():
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO job_rows (job_id, row_index, status) VALUES (?, ?, ?)",
+                [(job_id, idx, json.dumps(status, default=str)) for idx, status in row_statuses.items()]
+            )
+
+    def get_rows(self, job_id: str, limit: int = None, offset: int = 0) -> list:
+        """
+        Return the status of the rows of a job in sheet order, limit rows from offset (all by default)
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT status FROM job_rows WHERE job_id = ? ORDER BY row_index LIMIT ? OFFSET ?",
+                (job_id, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [json.loads(row["status"]) for row in rows]
+
+    def heartbeat(self) -> int:
+        """
+        Mark the running jobs of this queue as alive, return their number
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = 'Running' AND owner = ?",
+                (time.time(), self.owner)
+            )
+        return cursor.rowcount
+
+    def requeue_interrupted(self, stale_seconds: float = JOB_STALE_SECONDS) -> int:
+        """
+        Queue again the running jobs without heartbeat for stale_seconds, left by a stopped process.
+        Jobs of a process that is still running keep their heartbeat and are not touched.
+        Return their number.
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE jobs SET status = 'Queued', message = 'Interrupted, waiting for a worker', owner = NULL "
+                "WHERE status = 'Running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (time.time() - stale_seconds,)
+            )
+        return cursor.rowcount
+
+    def purge_finished(self, max_age_seconds: float = JOB_RETENTION_SECONDS) -> int:
+        """
+        Delete the jobs finished for longer than max_age_seconds, return their number
+        """
+        finished_before = time.time() - max_age_seconds
+        with self._transaction():
+            self.connection.execute(
+                "DELETE FROM job_rows WHERE job_id IN (SELECT id FROM jobs WHERE status IN ('Success', 'Failed') AND finished_at < ?)",
+                (finished_before,)
+            )
+            cursor = self.connection.execute(
+                "DELETE FROM jobs WHERE status IN ('Success', 'Failed') AND finished_at < ?",
+                (finished_before,)
+            )
+        return cursor.rowcount
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Hold the lock and run the statements of the block in one write transaction
+        """
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def _add_missing_columns(self, table: str, columns: dict) -> None:
+        """
+        Add the columns a file created by an older version lacks, from {name: type}
+        """
+        existing = {column["name"] for column in self.connection.execute(f"PRAGMA table_info({table})")}
+        for name, column_type in columns.items():
+            if name not in existing:
+                self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+class JobWorkerPool:
+    """
+    Background threads running the queued jobs, each with its own AutomationWorkflow.
+    The Google and MongoDB services and the mail outbox are shared by all the runs.
+    """
+    def __init__(
+        self,
+        job_queue: JobQueue = None,
+        max_workers: int = JOB_WORKERS,
+        google_service: GoogleService = None,
+        mongodb_service: MongoDBService = None,
+        mail_outbox: MailOutbox = None
+    ) -> None:
+        self.job_queue = job_queue or JobQueue()
+        self.max_workers = max_workers
+        self.google_service = google_service
+        self.mongodb_service = mongodb_service
+        self.mail_outbox = mail_outbox
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.heartbeat_stop_event = threading.Event()
+        self.heartbeat_thread = None
+        self.services_lock = threading.Lock()
+        self.report_scheduler = None
+
+    def start(self) -> None:
+        """
+        Resume the interrupted jobs and start the workers
+        """
+        self._requeue_interrupted()
+        self.job_queue.purge_finished()
+
+        # Open the MongoDB connections in the background, the first job then skips the cold-connection cost
+        if self.mongodb_service is None:
+            warm_up_mongodb_client(MONGODB_URI)
+        for idx in range(self.max_workers):
+            thread = threading.Thread(target=self._work, name=f"job_worker_{idx}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        self.heartbeat_thread = threading.Thread(target=self._heartbeat, name="job_heartbeat", daemon=True)
+        self.heartbeat_thread.start()
+
+        # Render the daily report ahead of the runs, when a precompute time is configured
+        if DAILY_REPORT_PRECOMPUTE_AT:
+            self.report_scheduler = DailyReportScheduler(self._get_services()[1])
+            self.report_scheduler.start()
+
+    def stop(self) -> None:
+        """
+        Stop the workers once their current job is done
+        """
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        # The heartbeat runs until the last job is done, so no other process takes it over meanwhile
+        self.heartbeat_stop_event.set()
+        if self.heartbeat_thread:
+            self.heartbeat_thread.join()
+            self.heartbeat_thread = None
+        if self.report_scheduler:
+            self.report_scheduler.stop()
+            self.report_scheduler = None
+
+    def _work(self) -> None:
+        """
+        Run queued jobs until the pool is stopped
+        """
+        while not self.stop_event.is_set():
+            try:
+                job = self.job_queue.claim()
+            except Exception as e:
+                logging.error(f"Error claiming a job: {e}")
+                job = None
+            if job is None:
+                self.stop_event.wait(JOB_POLL_SECONDS)
+                continue
+            self._run_job(*job)
+
+    def _heartbeat(self) -> None:
+        """
+        Keep the running jobs of this pool alive, and queue again the jobs of the processes that stopped
+        """
+        while not self.heartbeat_stop_event.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                self.job_queue.heartbeat()
+                self._requeue_interrupted()
+            except Exception as e:
+                logging.error(f"Error in the job heartbeat: {e}")
+
+    def _requeue_interrupted(self) -> None:
+        requeued = self.job_queue.requeue_interrupted()
+        if requeued:
+            logging.info(f"Queued {requeued} interrupted jobs again")
+
+    def _run_job(self, job_id: str, input_fields: dict) -> None:
+        """
+        Run the workflow of a job, recording its progress and per-row status after every step
+        """
+        google_service, mongodb_service, mail_outbox = self._get_services()
+        automation_workflow = AutomationWorkflow(google_service, mongodb_service, mail_outbox=mail_outbox)
+        written_statuses = {} # row index -> status tuple last written, only the rows that changed are written again
+
+        def save_rows() -> dict:
+            rows = automation_workflow.query_dict.get("data", [])
+            changed = {}
+            for idx, row in enumerate(rows):
+                status = _row_status(row)
+                if written_statuses.get(idx) != status:
+                    written_statuses[idx] = status
+                    changed[idx] = dict(zip(ROW_STATUS_COLUMNS, status))
+            self.job_queue.update_rows(job_id, changed)
+            return _row_counts(written_statuses.values())
+
+        def update_status(message):
+            self.job_queue.update(job_id, message=message, row_counts=save_rows())
+
+        try:
+            automation_workflow.load_input_data(input_fields, update_status)
+            automation_workflow.process_main_steps()
+            automation_workflow.process_optional_steps()
+            self.job_queue.update(
+                job_id,
+                status=automation_workflow.status,
+                status_of_optional_steps=automation_workflow.status_of_optional_steps,
+                message="Finished",
+                error_message=automation_workflow.error_message or "",
+                row_counts=save_rows(),
+                metrics=automation_workflow.report_metrics(),
+            )
+        except Exception as e:
+            logging.error(f"Error in job {job_id}: {e}")
+            self.job_queue.update(job_id, status="Failed", message="Finished", error_message=str(e))
+        finally:
+            automation_workflow.reset_resources()
+
+    def _get_services(self) -> tuple:
+        """
+        Create the shared services on first use, so starting the pool never waits for them
+        """
+        with self.services_lock:
+            self.google_service = self.google_service or GoogleService()
+            self.mongodb_service = self.mongodb_service or MongoDBService()
+            self.mail_outbox = self.mail_outbox or get_mail_outbox(self.google_service)
+            return self.google_service, self.mongodb_service, self.mail_outbox
+
+def get_job_worker_pool() -> JobWorkerPool:
+    """
+    Return the process-wide worker pool, started on first use
+    """
+    global _WORKER_POOL
+    with _WORKER_POOL_LOCK:
+        if _WORKER_POOL is None:
+            _WORKER_POOL = JobWorkerPool()
+            _WORKER_POOL.start()
+        return _WORKER_POOL
+
+def _row_status(row: dict) -> tuple:
+    """
+    Summarize the progress of a row for the UI, one value per ROW_STATUS_COLUMNS
+    """
+    return (
+        row.get("File Name", ""),
+        bool(row.get("validation")),
+        row.get("generation_status", ""),
+        bool(row.get("mongodb_id")),
+        bool(row.get("google_drive_uploaded_file")),
+        bool(row.get("cache_hit")),
+        (row.get("invalid_message") or row.get("generation_error") or row.get("mongodb_error") or "").strip(),
+    )
+
+def _row_counts(statuses) -> dict:
+    """
+    Count the rows of a job that reached each stage, from their status tuples
+    """
+    counts = {"rows": 0, "valid": 0, "generated": 0, "stored": 0, "uploaded": 0, "reused": 0}
+    for _, valid, generation, stored, uploaded, reused, _ in statuses:
+        counts["rows"] += 1
+        counts["valid"] += valid
+        counts["generated"] += generation == "Success"
+        counts["stored"] += stored
+        counts["uploaded"] += uploaded
+        counts["reused"] += reused
+    return counts
@@ -0,0 +1,155 @@
+import queue
+import threading
+
+# Marker passed through the queues once a stage has no more rows
+_END_OF_STREAM = object()
+_POLL_SECONDS = 0.1
+
+class PipelineError(Exception):
+    def __init__(self, stage_name: str, error: Exception) -> None:
+        super().__init__(f"Stage '{stage_name}' failed: {error}")
+        self.stage_name = stage_name
+        self.error = error
+
+def run_pipeline(source, stages: dict, queue_size: int = 100, status_callback=None) -> list:
+    """
+    Stream rows from source through the stages over bounded queues.
+    stages maps a stage name to {"function", "description", "workers", "batch_size"}. Each function receives a
+    list of (index, row) items and updates the rows in place.
+    The status callback is only called from the calling thread, once per stage when it receives its first rows.
+    Return the processed rows in their original order, raise PipelineError if any stage fails.
+    """
+    stop_event = threading.Event()
+    status_queue = queue.Queue()
+    errors = []
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+
+    def fail(stage_name, error):
+        errors.append(PipelineError(stage_name, error))
+        stop_event.set()
+
+    # 1. Feed the source rows into the first queue
+    def feed():
+        try:
+            for item in enumerate(source):
+                if not _put(queues[0], item, stop_event):
+                    return
+        except Exception as e:
+            fail("source", e)
+        _put(queues[0], _END_OF_STREAM, stop_event)
+
+    # 2. Start the workers of every stage
+    threads = [threading.Thread(target=feed, daemon=True)]
+    for position, (stage_name, stage) in enumerate(stages.items()):
+        stage_state = {"started": False, "remaining_workers": stage.get("workers", 1), "lock": threading.Lock()}
+        for _ in range(stage.get("workers", 1)):
+            threads.append(threading.Thread(
+                target=_run_stage_worker,
+                args=(stage_name, stage, stage_state, queues[position], queues[position + 1], stop_event, status_queue, fail),
+                daemon=True
+            ))
+    for thread in threads:
+        thread.start()
+
+    # 3. Collect the processed rows and relay status updates on the calling thread
+    results = []
+    finished = False
+    while not finished and not stop_event.is_set():
+        _relay_status(status_queue, status_callback)
+        try:
+            item = queues[-1].get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if item is _END_OF_STREAM:
+            finished = True
+        else:
+            results.append(item)
+
+    for thread in threads:
+        thread.join()
+    _relay_status(status_queue, status_callback)
+
+    if errors:
+        raise errors[0]
+    return [row for _, row in sorted(results, key=lambda item: item[0])]
+
+def _run_stage_worker(stage_name, stage, stage_state, input_queue, output_queue, stop_event, status_queue, fail) -> None:
+    """
+    Pull batches from the input queue, run the stage function and forward the rows
+    """
+    batch_size = stage.get("batch_size", 1)
+    try:
+        while not stop_event.is_set():
+            batch, end_of_stream = _get_batch(input_queue, batch_size, stop_event)
+            if batch:
+                with stage_state["lock"]:
+                    if not stage_state["started"]:
+                        stage_state["started"] = True
+                        status_queue.put(stage["description"])
+                stage["function"](batch)
+                for item in batch:
+                    if not _put(output_queue, item, stop_event):
+                        return
+            if end_of_stream:
+                # Let sibling workers see the end of the stream too
+                _put(input_queue, _END_OF_STREAM, stop_event)
+                break
+    except Exception as e:
+        fail(stage_name, e)
+        return
+
+    # The last worker of the stage closes the stream for the next stage
+    with stage_state["lock"]:
+        stage_state["remaining_workers"] -= 1
+        last_worker = stage_state["remaining_workers"] == 0
+    if last_worker:
+        _put(output_queue, _END_OF_STREAM, stop_event)
+
+def _get_batch(input_queue, batch_size, stop_event) -> tuple:
+    """
+    Wait for the next item, then take whatever else is already queued up to batch_size.
+    Return (batch, end_of_stream).
+    """
+    batch = []
+    while not batch and not stop_event.is_set():
+        try:
+            item = input_queue.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if item is _END_OF_STREAM:
+            return batch, True
+        batch.append(item)
+
+    while len(batch) < batch_size:
+        try:
+            item = input_queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is _END_OF_STREAM:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+def _put(target_queue, item, stop_event) -> bool:
+    """
+    Put an item on a bounded queue, giving up if the pipeline is stopped
+    """
+    while not stop_event.is_set():
+        try:
+            target_queue.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _relay_status(status_queue, status_callback) -> None:
+    """
+    Forward pending stage descriptions to the status callback
+    """
+    while True:
+        try:
+            description = status_queue.get_nowait()
+        except queue.Empty:
+            return
+        if status_callback:
+            status_callback(f"Running step: {description}")
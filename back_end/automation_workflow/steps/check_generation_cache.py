@@ -0,0 +1,148 @@
+import json
+import hashlib
+import logging
+
+from back_end.automation_workflow.steps.shared.common import ACCEPTABLE_COLUMNS, GENERATION_CACHE_MAX_ENTRIES
+from back_end.services.mongodb_service.mongodb_service import MongoDBService
+
+def main_check_generation_cache(query_dict: dict, mongodb_service: MongoDBService) -> dict:
+    """
+    Mark valid rows that match a previous successful run as cache hits, reusing their
+    mongodb_id and google_drive_uploaded_file so the generate, store and upload steps skip them.
+    Hit/miss counters are kept in query_dict["generation_cache"].
+    """
+    try:
+        input_source_data = query_dict.get("data", [])
+        check_rows_in_generation_cache(input_source_data, query_dict, mongodb_service)
+        return input_source_data
+    except Exception as e:
+        # The cache is an optimization, a failing lookup must not fail the run
+        logging.error(f"Error in main_check_generation_cache: {e}")
+        return input_source_data
+
+async def main_check_generation_cache_async(query_dict: dict, mongodb_service) -> dict:
+    """
+    Async variant of main_check_generation_cache, for an AsyncMongoDBService
+    """
+    try:
+        input_source_data = query_dict.get("data", [])
+        await check_rows_in_generation_cache_async(input_source_data, query_dict, mongodb_service)
+        return input_source_data
+    except Exception as e:
+        logging.error(f"Error in main_check_generation_cache: {e}")
+        return input_source_data
+
+def check_rows_in_generation_cache(rows: list, query_dict: dict, mongodb_service: MongoDBService) -> list:
+    """
+    Look up a batch of rows in the generation cache and mark the hits
+    """
+    valid_rows = _hash_rows(rows, query_dict)
+    _mark_cache_hits(valid_rows, mongodb_service.find_generation_cache([row["content_hash"] for row in valid_rows]), query_dict)
+    return rows
+
+async def check_rows_in_generation_cache_async(rows: list, query_dict: dict, mongodb_service) -> list:
+    """
+    Async variant of check_rows_in_generation_cache
+    """
+    valid_rows = _hash_rows(rows, query_dict)
+    _mark_cache_hits(valid_rows, await mongodb_service.find_generation_cache([row["content_hash"] for row in valid_rows]), query_dict)
+    return rows
+
+def _hash_rows(rows: list, query_dict: dict) -> list:
+    """
+    Set the content_hash of every row, return the valid rows to look up
+    """
+    # Every row gets its idempotency key, so a rerun updates the stored document of an invalid row too.
+    # Only valid rows can be generated, so only they are looked up.
+    google_drive_folder_url = query_dict.get("google_drive_folder_url", "")
+    for row in rows:
+        row["content_hash"] = row_content_hash(row, google_drive_folder_url)
+    return [row for row in rows if row.get("validation")]
+
+def _mark_cache_hits(valid_rows: list, cached_entries: dict, query_dict: dict) -> None:
+    """
+    Reuse the stored document and Drive file of the rows found in the cache, count hits and misses
+    """
+    counters = query_dict.setdefault("generation_cache", {"hits": 0, "misses": 0})
+    for row in valid_rows:
+        cached_entry = cached_entries.get(row["content_hash"])
+        if cached_entry:
+            row["cache_hit"] = True
+            row["file_path"] = ""
+            row["generation_status"] = "Success"
+            row["mongodb_id"] = cached_entry["mongodb_id"]
+            row["google_drive_uploaded_file"] = cached_entry["google_drive_uploaded_file"]
+            counters["hits"] += 1
+        else:
+            counters["misses"] += 1
+
+def main_update_generation_cache(query_dict: dict, mongodb_service: MongoDBService) -> dict:
+    """
+    Record the rows that went through every step successfully and were not checkpointed yet,
+    refresh the hits and evict the oldest entries
+    """
+    try:
+        mongodb_service.save_generation_cache(_uncheckpointed_cache_entries(query_dict.get("data", [])))
+        mongodb_service.evict_generation_cache(GENERATION_CACHE_MAX_ENTRIES)
+        return query_dict.get("generation_cache", {})
+    except Exception as e:
+        logging.error(f"Error in main_update_generation_cache: {e}")
+        return {}
+
+async def main_update_generation_cache_async(query_dict: dict, mongodb_service) -> dict:
+    """
+    Async variant of main_update_generation_cache. The async upload step saves no checkpoints,
+    so the Drive files of the uploaded rows are recorded on their stored documents here.
+    """
+    try:
+        rows = query_dict.get("data", [])
+        await mongodb_service.save_uploaded_files(_uploaded_files(_rows_to_checkpoint(rows)))
+        await mongodb_service.save_generation_cache(_uncheckpointed_cache_entries(rows))
+        await mongodb_service.evict_generation_cache(GENERATION_CACHE_MAX_ENTRIES)
+        return query_dict.get("generation_cache", {})
+    except Exception as e:
+        logging.error(f"Error in main_update_generation_cache: {e}")
+        return {}
+
+def save_row_checkpoints(rows: list, mongodb_service: MongoDBService) -> list:
+    """
+    Persist the progress of uploaded rows as soon as they are done: the Drive file is recorded on the
+    stored document and the row is added to the generation cache, so a rerun of a failed run skips it
+    """
+    try:
+        completed_rows = _rows_to_checkpoint(rows)
+        mongodb_service.save_uploaded_files(_uploaded_files(completed_rows))
+        mongodb_service.save_generation_cache([_cache_entry(row) for row in completed_rows if row.get("content_hash")])
+        for row in completed_rows:
+            row["checkpointed"] = True
+    except Exception as e:
+        # The rows are recorded again by main_update_generation_cache at the end of the run
+        logging.error(f"Error saving row checkpoints: {e}")
+    return rows
+
+def _is_completed(row: dict) -> bool:
+    return bool(row.get("mongodb_id") and row.get("google_drive_uploaded_file"))
+
+def _rows_to_checkpoint(rows: list) -> list:
+    return [row for row in rows if _is_completed(row) and not row.get("cache_hit") and not row.get("checkpointed")]
+
+def _uploaded_files(rows: list) -> list:
+    return [(row["mongodb_id"], row["google_drive_uploaded_file"]) for row in rows]
+
+def _uncheckpointed_cache_entries(rows: list) -> list:
+    return [_cache_entry(row) for row in rows if row.get("content_hash") and _is_completed(row) and not row.get("checkpointed")]
+
+def _cache_entry(row: dict) -> dict:
+    return {
+        "content_hash": row["content_hash"],
+        "mongodb_id": row.get("mongodb_id", ""),
+        "google_drive_uploaded_file": row.get("google_drive_uploaded_file", {}),
+    }
+
+def row_content_hash(row: dict, google_drive_folder_url: str = "") -> str:
+    """
+    Stable hash of a row's ACCEPTABLE_COLUMNS values and its destination folder
+    """
+    content = {column: str(row.get(column, "")).strip() for column in ACCEPTABLE_COLUMNS}
+    content["google_drive_folder_url"] = google_drive_folder_url or ""
+    return hashlib.sha256(json.dumps(content, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
@@ -2,38 +2,64 @@ import os
 import json
 import logging
 
-from back_end.automation_workflow.steps.shared.common import ACCEPTABLE_COLUMNS
+from back_end.automation_workflow.steps.shared.common import ACCEPTABLE_COLUMNS, IN_MEMORY_OUTPUT_MAX_BYTES
+from back_end.services.ai_service.generation_scheduler import GenerationScheduler
 
-def main_generate_content(query_dict: dict, temp_folder_path: str) -> dict:
+def main_generate_content(query_dict: dict, temp_folder_path: str, generation_scheduler: GenerationScheduler = None) -> dict:
     """
     Main function to generate content
-    For each element in input_source_data, create a JSON file with its content in temp_folder_path.
+    For each element in input_source_data, create a JSON file with its content in temp_folder_path,
+    or keep it in memory when in_memory_output is enabled.
+    With ai_generation enabled, the content is first generated by the row's AI model.
     """
     try:
         # Ensure temp folder exists
         os.makedirs(temp_folder_path, exist_ok=True)
 
         input_source_data = query_dict.get("data", [])
+        in_memory_output = query_dict.get("in_memory_output", False)
         updating_input_source_data = []
 
+        # Generate the AI content of every row concurrently
+        if query_dict.get("ai_generation"):
+            (generation_scheduler or GenerationScheduler()).generate_rows(input_source_data)
+
         for idx, element in enumerate(input_source_data):
-            # Create JSON file for each valid element
-            if element.get("validation", False):
-                file_name = element.get("File Name", f"generated_content_{idx}")
-                file_path = os.path.join(temp_folder_path, file_name+".json")
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json_data = {k: element[k] for k in ACCEPTABLE_COLUMNS if k in element}
-                    json.dump(json_data, f, ensure_ascii=False, indent=4)
-                    element["file_path"] = file_path
-                    element["generation_status"] = "Success"
-            else:
-                element["file_path"] = ""
-                element["generation_status"] = "Failed"
-
-            updating_input_source_data.append(element)
+            updating_input_source_data.append(generate_row_content(idx, element, temp_folder_path, in_memory_output))
 
         return updating_input_source_data
 
     except Exception as e:
         logging.error(f"Error in main_generate_content: {e}")
         return {}
+
+
+def generate_row_content(idx: int, element: dict, temp_folder_path: str, in_memory_output: bool = False) -> dict:
+    """
+    Create the JSON content of a single valid row and record its generation status.
+    In memory mode the content is kept as bytes in "file_content", outputs larger than
+    IN_MEMORY_OUTPUT_MAX_BYTES are still spilled to a file in temp_folder_path.
+    """
+    if element.get("cache_hit"):
+        # Generated by a previous run, nothing to do
+        return element
+    elif element.get("validation", False) and not element.get("generation_error"):
+        file_name = element.get("File Name", f"generated_content_{idx}") + ".json"
+        json_data = {k: element[k] for k in ACCEPTABLE_COLUMNS if k in element}
+        if "generated_content" in element:
+            json_data["Generated Content"] = element["generated_content"]
+        content = json.dumps(json_data, ensure_ascii=False, indent=4).encode('utf-8')
+        element["output_file_name"] = file_name
+        if in_memory_output and len(content) <= IN_MEMORY_OUTPUT_MAX_BYTES:
+            element["file_content"] = content
+            element["file_path"] = ""
+        else:
+            file_path = os.path.join(temp_folder_path, file_name)
+            with open(file_path, 'wb') as f:
+                f.write(content)
+            element["file_path"] = file_path
+        element["generation_status"] = "Success"
+    else:
+        element["file_path"] = ""
+        element["generation_status"] = "Failed"
+    return element
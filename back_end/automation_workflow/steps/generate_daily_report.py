@@ -1,62 +1,110 @@
-
-import matplotlib.pyplot as plt
+import time
+import asyncio
 import datetime
 import io, base64
 import logging
 
 from back_end.services.google_service.google_service import GoogleService
 from back_end.services.mongodb_service.mongodb_service import MongoDBService
+from back_end.services.google_service.mail_outbox import MailOutbox
+from back_end.automation_workflow.steps.shared.daily_report_cache import DailyReportCache, get_daily_report_cache
+
+# Number of days covered by the daily report
+DAILY_REPORT_DAYS = 5
 
 def main_generate_daily_report(
     query_dict: dict, 
     mongodb_service: MongoDBService, 
-    google_service: GoogleService
+    google_service: GoogleService,
+    mail_outbox: MailOutbox = None,
+    report_cache: DailyReportCache = None
 ) -> dict:
     """
     Generate a daily report from the processed data.
+    The report is rendered once per window and daily counters, later runs attach the cached one.
+    Render time and cache hit rate are kept in query_dict["daily_report"].
+    With a mail outbox, the report is queued and replaces the one still queued for the recipient.
     """
     try:
         email_address = query_dict.get("email_address")
-        
-        # 1. Fetch the necessary data from the mongodb
-        all_docs = mongodb_service.find_documents_with_filter({})
-
-        # 2. Group documents by their creation date
-        grouped_docs = _group_documents_by_date(all_docs)
+        report_cache = report_cache or get_daily_report_cache()
 
-        # 3. Generate analytics chart
-        chart_html = _generate_analytics_chart(grouped_docs)
+        # 1. Read the pre-aggregated daily counters for the report window
+        window = daily_report_window()
+        daily_counts = mongodb_service.find_daily_counters(window[0], window[1])
 
-        # 4. Generate email content
-        subject, body = _generate_mail_content(grouped_docs, chart_html)
+        # 2. Reuse the cached report, or render the chart and email content
+        report, cache_hit = get_or_render_daily_report(window, daily_counts, report_cache)
+        query_dict["daily_report"] = {"cache_hit": cache_hit, "render_seconds": report["render_seconds"], **report_cache.stats()}
 
-        # 5. Send email notification if email address is provided
-        sent_mail = google_service.send_email(email_address, subject, body)
+        # 3. Send email notification if email address is provided
+        if mail_outbox:
+            sent_mail = mail_outbox.enqueue(email_address, report["subject"], report["body"], kind="daily_report")
+        else:
+            sent_mail = google_service.send_email(email_address, report["subject"], report["body"])
 
         return sent_mail
     except Exception as e:
         logging.error(f"Error at main_generate_daily_report: {e}")
         return {}
 
+async def main_generate_daily_report_async(
+    query_dict: dict,
+    mongodb_service,
+    google_service,
+    mail_outbox: MailOutbox = None,
+    report_cache: DailyReportCache = None
+) -> dict:
+    """
+    Async variant of main_generate_daily_report, for AsyncMongoDBService and AsyncGoogleService.
+    """
+    try:
+        email_address = query_dict.get("email_address")
+        report_cache = report_cache or get_daily_report_cache()
+
+        # 1. Read the pre-aggregated daily counters for the report window
+        window = daily_report_window()
+        daily_counts = await mongodb_service.find_daily_counters(window[0], window[1])
+
+        # 2. Reuse the cached report, or render it off the event loop
+        report, cache_hit = await asyncio.to_thread(get_or_render_daily_report, window, daily_counts, report_cache)
+        query_dict["daily_report"] = {"cache_hit": cache_hit, "render_seconds": report["render_seconds"], **report_cache.stats()}
+
+        # 3. Send email notification, the outbox writes to SQLite off the event loop
+        if mail_outbox:
+            return await asyncio.to_thread(mail_outbox.enqueue, email_address, report["subject"], report["body"], kind="daily_report")
+        return await google_service.send_email(email_address, report["subject"], report["body"])
+    except Exception as e:
+        logging.error(f"Error at main_generate_daily_report: {e}")
+        return {}
+
+def daily_report_window() -> tuple:
+    """
+    Return the (start_date, end_date) covered by today's report
+    """
+    end_date = datetime.date.today()
+    return end_date - datetime.timedelta(days=DAILY_REPORT_DAYS - 1), end_date
 
-def _group_documents_by_date(docs: list) -> dict:
+def get_or_render_daily_report(window: tuple, daily_counts: dict, report_cache: DailyReportCache, count_lookup: bool = True) -> tuple:
     """
-    Group documents by their creation date.
+    Return (report, cache_hit), the report being rendered only if the cached one is missing or stale.
+    Renders are serialized: pyplot is not thread-safe, and concurrent runs reuse the first render.
     """
-    grouped_docs = {}
-    for doc in docs:
-        date = doc.get("created_date").date()
-        if date not in grouped_docs:
-            grouped_docs[date] = {"Success": [], "Failed": []}
-
-        # Consider a successful doc by the generation status
-        if doc.get("generation_status", "Failed") == "Success":
-            grouped_docs[date]["Success"].append(doc)
-        else:
-            grouped_docs[date]["Failed"].append(doc)
-    return grouped_docs
+    report = report_cache.get(window, daily_counts, count_lookup)
+    if report is not None:
+        return report, True
+    with report_cache.render_lock:
+        # Rendered by a concurrent run while this one was waiting
+        report = report_cache.get(window, daily_counts, count_lookup=False)
+        if report is not None:
+            return report, True
+        started_at = time.perf_counter()
+        chart_html = _generate_analytics_chart(daily_counts, window[1])
+        subject, body = _generate_mail_content(daily_counts, chart_html)
+        render_seconds = round(time.perf_counter() - started_at, 6)
+        return report_cache.set(window, daily_counts, subject, body, render_seconds), False
 
-def _generate_mail_content(docs: dict, chart_html: str) -> tuple:
+def _generate_mail_content(daily_counts: dict, chart_html: str) -> tuple:
     subject = "[AutomationWorkflow] Daily report"
 
     body = """
@@ -65,13 +113,13 @@ def _generate_mail_content(docs: dict, chart_html: str) -> tuple:
 """
     # Add analytics chart image
     body += f"<div style='text-align:center;'>{chart_html}</div><hr>"
-    if not docs:
+    if not daily_counts:
         body += "<p>No data available for the selected period.</p>"
     else:
-        for date, results in sorted(docs.items()):
+        for date, counts in sorted(daily_counts.items()):
             body += f"<h2 style='color:#444;'>{date}</h2>"
-            num_success = len(results.get("Success", []))
-            num_failed = len(results.get("Failed", []))
+            num_success = counts.get("Success", 0)
+            num_failed = counts.get("Failed", 0)
             body += f"<ul>"
             body += f"<li><b>✅ Successful generations:</b> {num_success}</li>"
             body += f"<li><b>❌ Failed generations:</b> {num_failed}</li>"
@@ -79,17 +127,20 @@ def _generate_mail_content(docs: dict, chart_html: str) -> tuple:
             body += "<hr>"
     return subject, body
 
-def _generate_analytics_chart(docs: dict) -> str:
+def _generate_analytics_chart(daily_counts: dict, today: datetime.date = None) -> str:
+    # matplotlib is only needed by the report, it is imported on first use
+    import matplotlib.pyplot as plt
+
     # Get last 5 days sorted
-    today = datetime.date.today()
-    last_5_days = [today - datetime.timedelta(days=i) for i in range(4, -1, -1)]
+    today = today or datetime.date.today()
+    last_5_days = [today - datetime.timedelta(days=i) for i in range(DAILY_REPORT_DAYS - 1, -1, -1)]
     last_5_days_str = [d.strftime('%Y-%m-%d') for d in last_5_days]
     success_counts = []
     failed_counts = []
     for d in last_5_days:
-        day_docs = docs.get(d, {'Success': [], 'Failed': []})
-        success_counts.append(len(day_docs.get('Success', [])))
-        failed_counts.append(len(day_docs.get('Failed', [])))
+        day_counts = daily_counts.get(d, {'Success': 0, 'Failed': 0})
+        success_counts.append(day_counts.get('Success', 0))
+        failed_counts.append(day_counts.get('Failed', 0))
     plt.figure(figsize=(7,3.5))
     plt.plot(last_5_days_str, success_counts, marker='o', color='green', label='Success')
     plt.plot(last_5_days_str, failed_counts, marker='o', color='red', label='Failed')
@@ -1,7 +1,8 @@
-
-
 import logging
 
+from back_end.services.google_service.google_service import SHEETS_CHUNK_ROWS
+from back_end.automation_workflow.steps.shared.row_record import row_record_factory
+
 def main_load_input_source_data(query_dict: dict, google_service) -> None:
     """
     Main function to load input source data for the automation workflow.
@@ -12,12 +13,53 @@ def main_load_input_source_data(query_dict: dict, google_service) -> None:
 
         # Load data from Google Sheets
         if google_sheets_url:
-            result = google_service.get_data_from_sheets(google_sheets_url)
-            if result.get("data"):
-                # Extract rows from Google Sheet data
-                result["data"] = [dict(zip(result["data"][0], row)) for row in result["data"][1:]]
+            result = load_input_source_rows(query_dict, google_service)
+            result["data"] = list(result["data"])
+            if result["data"]:
                 return result
 
     except Exception as e:
         logging.error(f"Error loading input source data: {e}")
-        return {}
\ No newline at end of file
+        return {}
+
+async def main_load_input_source_data_async(query_dict: dict, google_service) -> dict:
+    """
+    Async variant of main_load_input_source_data, for an AsyncGoogleService.
+    """
+    try:
+        google_sheets_url = query_dict.get("google_sheets_url", "")
+        if google_sheets_url:
+            result = await google_service.get_data_from_sheets(google_sheets_url)
+            if result.get("data"):
+                build_row = row_record_factory(result["data"][0])
+                result["data"] = [build_row(row) for row in result["data"][1:]]
+                if result["data"]:
+                    return result
+    except Exception as e:
+        logging.error(f"Error loading input source data: {e}")
+        return {}
+
+def load_input_source_rows(query_dict: dict, google_service) -> dict:
+    """
+    Load the sheet metadata and a generator of rows (RowRecord), so rows can be processed in bounded memory.
+    """
+    google_sheets_url = query_dict.get("google_sheets_url", "")
+    chunk_rows = query_dict.get("sheets_chunk_rows") or SHEETS_CHUNK_ROWS
+    metadata = google_service.get_sheet_metadata(google_sheets_url)
+    rows = google_service.iter_data_from_sheets(google_sheets_url, chunk_rows=chunk_rows, metadata=metadata)
+    return {
+        "data": _iter_row_dicts(rows),
+        "file_name": metadata["file_name"],
+        "sheet_name": metadata["sheet_name"]
+    }
+
+def _iter_row_dicts(rows):
+    """
+    Extract rows from Google Sheet data as RowRecords keyed by the header row
+    """
+    header = next(rows, None)
+    if header is None:
+        return
+    build_row = row_record_factory(header)
+    for row in rows:
+        yield build_row(row)
@@ -1,18 +1,55 @@
 from datetime import datetime
+import asyncio
 import logging
 
 from back_end.services.google_service.google_service import GoogleService
+from back_end.services.google_service.mail_outbox import MailOutbox
 
-def main_send_email_notifications(progress_status: str, query_dict: dict, error_message: str, google_service: GoogleService) -> dict:
+def main_send_email_notifications(
+    progress_status: str,
+    query_dict: dict,
+    error_message: str,
+    google_service: GoogleService,
+    mail_outbox: MailOutbox = None
+) -> dict:
     """
-    Main function to send email notifications
+    Main function to send email notifications.
+    With a mail outbox, the notification is queued and coalesced with the other ones of the recipient.
     """
     try:
         # Get email address
         email_address = query_dict.get("email_address")
         if email_address:
             subject, body = _prepare_mail_content(progress_status, query_dict, error_message)
-            sent_message = google_service.send_email(email_address, subject, body)
+            if mail_outbox:
+                sent_message = mail_outbox.enqueue(email_address, subject, body)
+            else:
+                sent_message = google_service.send_email(email_address, subject, body)
+
+        return sent_message
+    except Exception as e:
+        logging.error(f"Error in main_send_email_notifications: {e}")
+        return {}
+
+async def main_send_email_notifications_async(
+    progress_status: str,
+    query_dict: dict,
+    error_message: str,
+    google_service,
+    mail_outbox: MailOutbox = None
+) -> dict:
+    """
+    Async variant of main_send_email_notifications, for an AsyncGoogleService
+    """
+    try:
+        sent_message = {}
+        email_address = query_dict.get("email_address")
+        if email_address:
+            subject, body = _prepare_mail_content(progress_status, query_dict, error_message)
+            if mail_outbox:
+                sent_message = await asyncio.to_thread(mail_outbox.enqueue, email_address, subject, body)
+            else:
+                sent_message = await google_service.send_email(email_address, subject, body)
 
         return sent_message
     except Exception as e:
@@ -54,11 +91,15 @@ Your Google Sheet file has failed processing.<br><br>
     all_files = query_dict.get("data", [])
     created_files = [file for file in all_files if file.get("generation_status") == "Success"]
     uploaded_files = [file for file in all_files if file.get("google_drive_uploaded_file") != {}]
+    generation_cache = query_dict.get("generation_cache", {})
+    drive_uploads = query_dict.get("drive_uploads", {})
     body += f"""
 <h2>📊 Summary</h2>
 <ul>
   <li><b>Files created successfully:</b> {len(created_files)}/{len(all_files)}</li>
   <li><b>Files uploaded to Google Drive:</b> {len(uploaded_files)}/{len(all_files)}</li>
+  <li><b>Unchanged files reused from previous runs:</b> {generation_cache.get("hits", 0)} (cache misses: {generation_cache.get("misses", 0)})</li>
+  <li><b>Uploads skipped, already in Google Drive:</b> {drive_uploads.get("skipped", 0)} (updated in place: {drive_uploads.get("updated", 0)})</li>
 </ul>
 <h2>📄 Details of Each File</h2>
 <ul>
@@ -74,6 +115,8 @@ Your Google Sheet file has failed processing.<br><br>
         body += f"  &nbsp;&nbsp;- <b>Uploaded Status:</b> {uploaded_status}"
         if invalid_message:
             body += f"<br>  &nbsp;&nbsp;- <b>Invalid input:</b> {invalid_message}"
+        if file.get("generation_error"):
+            body += f"<br>  &nbsp;&nbsp;- <b>Generation error:</b> {file['generation_error']}"
         body += "</li>\n"
     body += "</ul>"
 
@@ -1,3 +1,5 @@
+import os
+
 ACCEPTABLE_COLUMNS = {
     "File Name": str,
     "Description": str,
@@ -15,6 +17,32 @@ MAPPING_COLUMNS = {
     "validation": "validation",
     "invalid_message": "invalid_message",
     "generation_status": "generation_status",
+    "content_hash": "content_hash",
     "created_data": "created_data",
     "updated_data": "updated_data",
-}
\ No newline at end of file
+}
+
+# Google Drive upload settings
+UPLOAD_MAX_WORKERS = 8
+UPLOAD_MAX_RETRIES = 5
+UPLOAD_BACKOFF_SECONDS = 1
+RETRYABLE_HTTP_STATUSES = [429, 500, 502, 503, 504]
+UPLOAD_CHECKPOINT_INTERVAL = 50 # Uploaded rows persisted together, at most this many are uploaded again after a crash
+DRIVE_FOLDER_INDEX = True # List the destination folder once per run to skip unchanged files and update changed ones in place
+
+# MongoDB write settings
+MONGODB_INSERT_CHUNK_SIZE = 500
+
+# Pipelined execution settings
+GENERATE_MAX_WORKERS = 4
+PIPELINE_QUEUE_SIZE = 100
+
+# Generation cache settings
+GENERATION_CACHE_MAX_ENTRIES = 100000
+
+# Generated outputs up to this size stay in memory when in_memory_output is enabled
+IN_MEMORY_OUTPUT_MAX_BYTES = 1024 * 1024
+
+# Run metrics exports, disabled when empty
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH", "")
+METRICS_PROMETHEUS_PATH = os.getenv("METRICS_PROMETHEUS_PATH", "")
@@ -0,0 +1,63 @@
+import threading
+
+# Windows kept in the cache, the current one and the one of yesterday while a precompute runs at midnight
+DAILY_REPORT_CACHE_MAX_WINDOWS = 2
+
+_DEFAULT_REPORT_CACHE = None
+_DEFAULT_REPORT_CACHE_LOCK = threading.Lock()
+
+class DailyReportCache:
+    """
+    Thread-safe in-process cache of the rendered daily report (subject and HTML body, chart included) per report window.
+    An entry is only valid for the daily counters it was rendered from: storing documents of the window changes
+    the counters, whichever process stored them, and so invalidates the report.
+    """
+    def __init__(self, max_windows: int = DAILY_REPORT_CACHE_MAX_WINDOWS):
+        self.max_windows = max_windows
+        self.entries = {} # (start_date, end_date) -> report
+        self.lock = threading.Lock()
+        self.render_lock = threading.Lock() # One render at a time, concurrent runs wait and reuse it
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, window: tuple, daily_counts: dict, count_lookup: bool = True) -> dict:
+        """
+        Return the cached report of a window if it was rendered from the same daily counters, None otherwise.
+        Lookups of the precompute are not counted in the hit rate.
+        """
+        with self.lock:
+            report = self.entries.get(window)
+            hit = report is not None and report["daily_counts"] == daily_counts
+            if count_lookup:
+                self.hits += 1 if hit else 0
+                self.misses += 0 if hit else 1
+            return report if hit else None
+
+    def set(self, window: tuple, daily_counts: dict, subject: str, body: str, render_seconds: float) -> dict:
+        """
+        Store the report rendered for a window, dropping the oldest windows above max_windows
+        """
+        report = {"daily_counts": daily_counts, "subject": subject, "body": body, "render_seconds": render_seconds}
+        with self.lock:
+            self.entries[window] = report
+            for oldest in sorted(self.entries)[:-self.max_windows]:
+                del self.entries[oldest]
+        return report
+
+    def stats(self) -> dict:
+        """
+        Return the hits, misses and hit rate since the cache was created
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
+
+def get_daily_report_cache() -> DailyReportCache:
+    """
+    Return the process-wide report cache, created on first use
+    """
+    global _DEFAULT_REPORT_CACHE
+    with _DEFAULT_REPORT_CACHE_LOCK:
+        if _DEFAULT_REPORT_CACHE is None:
+            _DEFAULT_REPORT_CACHE = DailyReportCache()
+        return _DEFAULT_REPORT_CACHE
@@ -0,0 +1,124 @@
+from collections.abc import MutableMapping
+
+# Keys of a row stored in slots: the sheet columns, then the fields added by the steps
+ROW_FIELDS = {
+    "File Name": "file_name",
+    "Description": "description",
+    "Assets": "assets",
+    "Output Format": "output_format",
+    "Model Specification": "model_specification",
+    "validation": "validation",
+    "invalid_message": "invalid_message",
+    "content_hash": "content_hash",
+    "cache_hit": "cache_hit",
+    "generated_content": "generated_content",
+    "generation_error": "generation_error",
+    "output_file_name": "output_file_name",
+    "file_path": "file_path",
+    "file_content": "file_content",
+    "generation_status": "generation_status",
+    "mongodb_id": "mongodb_id",
+    "mongodb_error": "mongodb_error",
+    "google_drive_uploaded_file": "google_drive_uploaded_file",
+    "checkpointed": "checkpointed",
+}
+
+class RowRecord(MutableMapping):
+    """
+    Compact row of a sheet: the known keys live in slots, other keys (extra sheet columns) in a dict
+    created on first use. It behaves like the dict rows it replaces: get, item access, in, iteration,
+    update, pop and equality with dicts. A key is missing until it is set, like in a dict.
+    """
+    __slots__ = tuple(ROW_FIELDS.values()) + ("extra",)
+
+    def __init__(self, values=None, **kwargs) -> None:
+        self.extra = None
+        if values:
+            self.update(values)
+        if kwargs:
+            self.update(kwargs)
+
+    def __getitem__(self, key):
+        slot = ROW_FIELDS.get(key)
+        if slot is None:
+            if self.extra is None:
+                raise KeyError(key)
+            return self.extra[key]
+        try:
+            return getattr(self, slot)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value) -> None:
+        slot = ROW_FIELDS.get(key)
+        if slot is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+        else:
+            setattr(self, slot, value)
+
+    def __delitem__(self, key) -> None:
+        slot = ROW_FIELDS.get(key)
+        if slot is None:
+            if self.extra is None:
+                raise KeyError(key)
+            del self.extra[key]
+            return
+        try:
+            delattr(self, slot)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for key, slot in ROW_FIELDS.items():
+            if hasattr(self, slot):
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key) -> bool:
+        slot = ROW_FIELDS.get(key)
+        if slot is None:
+            return self.extra is not None and key in self.extra
+        return hasattr(self, slot)
+
+    def get(self, key, default=None):
+        # Faster than the MutableMapping version, which goes through a KeyError for missing keys
+        slot = ROW_FIELDS.get(key)
+        if slot is None:
+            return default if self.extra is None else self.extra.get(key, default)
+        return getattr(self, slot, default)
+
+    def __repr__(self) -> str:
+        return f"RowRecord({dict(self)!r})"
+
+def row_record_factory(header: list):
+    """
+    Return a function building the RowRecord of a sheet row (a list of cells) keyed by header.
+    The slot of every column is looked up once per sheet, not once per cell.
+    """
+    columns = [(key, ROW_FIELDS.get(key)) for key in header]
+
+    def build(cells: list) -> RowRecord:
+        record = RowRecord()
+        for (key, slot), value in zip(columns, cells):
+            if slot is None:
+                record[key] = value
+            else:
+                setattr(record, slot, value)
+        return record
+    return build
+
+# Fields a row only needs until it is uploaded: the sheet inputs of the generation and its output
+ROW_PAYLOAD_FIELDS = ("Description", "Assets", "generated_content", "file_content")
+
+def release_row_payload(row) -> None:
+    """
+    Drop the payload of a processed row, keeping the fields that report its status
+    """
+    for key in ROW_PAYLOAD_FIELDS:
+        row.pop(key, None)
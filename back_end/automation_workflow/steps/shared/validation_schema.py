@@ -0,0 +1,133 @@
+import os
+import re
+import json
+
+from back_end.automation_workflow.steps.shared.common import ACCEPTABLE_COLUMNS
+
+# Rules can be changed without code edits, the schema falls back to ACCEPTABLE_COLUMNS without this file
+VALIDATION_SCHEMA_FILE = os.getenv(
+    "VALIDATION_SCHEMA_FILE",
+    os.path.join(os.path.dirname(__file__), "configs", "validation_schema.json")
+)
+SCHEMA_TYPES = {"str": str, "int": int, "float": float, "bool": bool}
+
+class CompiledSchema:
+    """
+    Validation rules compiled once into checker closures.
+    Column specs support: type, enum, required, min_length, max_length, regex and unique.
+    Rules are cross-column checks: {"when": {"column", "in"}, "then": {"column", "in"}, "message"}.
+    """
+    def __init__(self, schema: dict):
+        self.columns = schema.get("columns", {})
+        self.unique_columns = [column for column, spec in self.columns.items() if spec.get("unique")]
+        self.column_checkers = {column: _compile_column(column, spec) for column, spec in self.columns.items()}
+        self.rule_checkers = [_compile_rule(rule) for rule in schema.get("rules", [])]
+
+    def validate_row(self, row: dict, seen_values: dict = None, idx: int = None) -> list:
+        """
+        Return the error messages of a row.
+        seen_values ({column: {value: first row index}}) is the hash index used to detect duplicates
+        across a batch, share it between calls to check uniqueness over several batches.
+        """
+        errors = []
+        for column, check_column in self.column_checkers.items():
+            value = row.get(column, "")
+            error = check_column(value)
+            if error:
+                errors.append(error)
+
+            # Duplicate detection in O(1) per row
+            if seen_values is not None and column in self.unique_columns and value:
+                first_idx = seen_values.setdefault(column, {}).setdefault(value, idx)
+                if first_idx != idx:
+                    errors.append(f"Duplicate value for '{column}': {value} (first seen in row {first_idx})")
+
+        for rule_checker in self.rule_checkers:
+            error = rule_checker(row)
+            if error:
+                errors.append(error)
+        return errors
+
+def load_schema(schema_file: str = VALIDATION_SCHEMA_FILE) -> dict:
+    """
+    Load the validation schema from a JSON file, or build it from ACCEPTABLE_COLUMNS
+    """
+    if schema_file and os.path.exists(schema_file):
+        with open(schema_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    columns = {}
+    for column, value_constraint in ACCEPTABLE_COLUMNS.items():
+        if isinstance(value_constraint, list):
+            columns[column] = {"enum": value_constraint, "required": True}
+        else:
+            columns[column] = {"type": value_constraint.__name__, "required": True}
+    return {"columns": columns, "rules": []}
+
+def compile_schema(schema: dict = None) -> CompiledSchema:
+    """
+    Compile a schema, loading the configured one by default
+    """
+    return CompiledSchema(schema if schema is not None else load_schema())
+
+def _compile_column(column: str, spec: dict):
+    """
+    Build the checker of a column, returning its first error message or None.
+    A missing value is an error for required columns; optional empty columns skip every other check.
+    """
+    required = spec.get("required", True)
+    checkers = []
+
+    if "type" in spec:
+        expected_type = SCHEMA_TYPES[spec["type"]]
+        def check_type(value):
+            if not isinstance(value, expected_type):
+                return f"Invalid type for '{column}': expected {expected_type.__name__}, got {type(value).__name__}"
+        checkers.append(check_type)
+
+    if "enum" in spec:
+        allowed_values = frozenset(v.lower() for v in spec["enum"])
+        def check_enum(value):
+            if str(value).lower() not in allowed_values:
+                return f"Invalid value for '{column}': expected one of {spec['enum']}, got {value}"
+        checkers.append(check_enum)
+
+    if "min_length" in spec or "max_length" in spec:
+        min_length = spec.get("min_length", 0)
+        max_length = spec.get("max_length", float("inf"))
+        def check_length(value):
+            if not min_length <= len(str(value)) <= max_length:
+                return f"Invalid length for '{column}': expected {min_length} to {max_length} characters, got {len(str(value))}"
+        checkers.append(check_length)
+
+    if "regex" in spec:
+        pattern = re.compile(spec["regex"])
+        def check_regex(value):
+            if not pattern.search(str(value)):
+                return f"Invalid format for '{column}': {value} does not match {spec['regex']}"
+        checkers.append(check_regex)
+
+    def check_column(value):
+        if not value:
+            return f"Missing value for '{column}'" if required else None
+        for checker in checkers:
+            error = checker(value)
+            if error:
+                return error
+    return check_column
+
+def _compile_rule(rule: dict):
+    """
+    Build a cross-column checker: when rule["when"]["column"] is one of rule["when"]["in"],
+    rule["then"]["column"] must be one of rule["then"]["in"] (case-insensitive)
+    """
+    when_column, then_column = rule["when"]["column"], rule["then"]["column"]
+    when_values = frozenset(str(v).lower() for v in rule["when"]["in"])
+    then_values = frozenset(str(v).lower() for v in rule["then"]["in"])
+    message = rule.get("message", f"Invalid value for '{then_column}' when '{when_column}' is one of {rule['when']['in']}: expected one of {rule['then']['in']}")
+
+    def check_rule(row):
+        when_value, then_value = row.get(when_column, ""), row.get(then_column, "")
+        if when_value and then_value and str(when_value).lower() in when_values and str(then_value).lower() not in then_values:
+            return message
+    return check_rule
@@ -1,27 +1,20 @@
 import logging
 
-from back_end.automation_workflow.steps.shared.common import MAPPING_COLUMNS
+from back_end.automation_workflow.steps.shared.common import MAPPING_COLUMNS, MONGODB_INSERT_CHUNK_SIZE
 from back_end.services.mongodb_service.mongodb_service import MongoDBService
 
 def main_store_output_data(query_dict: dict, mongodb_service: MongoDBService) -> dict:
     try:
         # Extract relevant information from the query_dict
         input_source_data = query_dict.get("data", [])
-        updating_input_source_data = []
 
         # Validate the data
         if not input_source_data:
             return {}
 
-        # Store data into MongoDB
-        for row in input_source_data:
-            stored_data = _prepare_stored_data(row)
-            result = mongodb_service.insert_document(stored_data)
-            if result:
-                row["mongodb_id"] = result
-            else:
-                row["mongodb_id"] = ""
-            updating_input_source_data.append(row)
+        # Store data into MongoDB in bulk chunks
+        chunk_size = query_dict.get("mongodb_chunk_size") or MONGODB_INSERT_CHUNK_SIZE
+        updating_input_source_data = store_rows(input_source_data, mongodb_service, chunk_size)
 
         return updating_input_source_data
 
@@ -29,6 +22,79 @@ def main_store_output_data(query_dict: dict, mongodb_service: MongoDBService) ->
         logging.error(f"Error storing output data: {e}")
         return {}
 
+async def main_store_output_data_async(query_dict: dict, mongodb_service) -> dict:
+    """
+    Async variant of main_store_output_data, for an AsyncMongoDBService.
+    """
+    try:
+        input_source_data = query_dict.get("data", [])
+        if not input_source_data:
+            return {}
+
+        chunk_size = query_dict.get("mongodb_chunk_size") or MONGODB_INSERT_CHUNK_SIZE
+        return await store_rows_async(input_source_data, mongodb_service, chunk_size)
+
+    except Exception as e:
+        logging.error(f"Error storing output data: {e}")
+        return {}
+
+def store_rows(rows: list, mongodb_service: MongoDBService, chunk_size: int = MONGODB_INSERT_CHUNK_SIZE) -> list:
+    """
+    Upsert rows into MongoDB in bulk, keyed by content_hash so a rerun updates the documents
+    of the previous attempt, and record each row's mongodb_id (or mongodb_error)
+    """
+    # Rows reused from the generation cache are already stored
+    rows_to_store = [row for row in rows if not row.get("cache_hit")]
+    stored_data = [_prepare_stored_data(row) for row in rows_to_store]
+    results = mongodb_service.upsert_documents(stored_data, chunk_size=chunk_size)
+
+    # Keep the daily report counters in step with the stored documents
+    added_data, removed_data = _daily_counter_changes(stored_data, results)
+    mongodb_service.increment_daily_counters(added_data)
+    mongodb_service.increment_daily_counters(removed_data, delta=-1)
+
+    for row, (mongodb_id, error_message, _) in zip(rows_to_store, results):
+        row["mongodb_id"] = mongodb_id
+        if error_message:
+            logging.error(f"Error storing row '{row.get('File Name', '')}': {error_message}")
+            row["mongodb_error"] = error_message
+    return rows
+
+async def store_rows_async(rows: list, mongodb_service, chunk_size: int = MONGODB_INSERT_CHUNK_SIZE) -> list:
+    """
+    Async variant of store_rows, for an AsyncMongoDBService
+    """
+    rows_to_store = [row for row in rows if not row.get("cache_hit")]
+    stored_data = [_prepare_stored_data(row) for row in rows_to_store]
+    results = await mongodb_service.upsert_documents(stored_data, chunk_size=chunk_size)
+
+    added_data, removed_data = _daily_counter_changes(stored_data, results)
+    await mongodb_service.increment_daily_counters(added_data)
+    await mongodb_service.increment_daily_counters(removed_data, delta=-1)
+
+    for row, (mongodb_id, error_message, _) in zip(rows_to_store, results):
+        row["mongodb_id"] = mongodb_id
+        if error_message:
+            logging.error(f"Error storing row '{row.get('File Name', '')}': {error_message}")
+            row["mongodb_error"] = error_message
+    return rows
+
+def _daily_counter_changes(stored_data: list, results: list) -> tuple:
+    """
+    Return the documents to add to and remove from the daily counters: new documents are added,
+    updated documents whose status changed move from their previous status to the new one
+    """
+    added_data, removed_data = [], []
+    for data, (mongodb_id, _, previous) in zip(stored_data, results):
+        if not mongodb_id:
+            continue
+        if previous is None:
+            added_data.append(data)
+        elif previous.get("generation_status") != data.get("generation_status") and previous.get("created_date"):
+            added_data.append({**data, "created_date": previous["created_date"]})
+            removed_data.append(previous)
+    return added_data, removed_data
+
 def _prepare_stored_data(data: dict) -> dict:
     """
     Prepare the data for storage in MongoDB
@@ -1,27 +1,169 @@
+import time
+import asyncio
 import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
+from back_end.automation_workflow.steps.shared.common import UPLOAD_MAX_WORKERS, UPLOAD_MAX_RETRIES, UPLOAD_BACKOFF_SECONDS, RETRYABLE_HTTP_STATUSES, UPLOAD_CHECKPOINT_INTERVAL
+from back_end.automation_workflow.steps.check_generation_cache import save_row_checkpoints
 from back_end.services.google_service.google_service import GoogleService
+from back_end.services.google_service.drive_folder_index import DriveFolderIndex, payload_md5
+from back_end.services.mongodb_service.mongodb_service import MongoDBService
 
-def main_upload_output_data(query_dict: dict, google_service: GoogleService) -> dict:
+def main_upload_output_data(query_dict: dict, google_service: GoogleService, mongodb_service: MongoDBService = None) -> dict:
     try:
         # Extract relevant information from the query_dict
         input_source_data = query_dict.get("data", [])
-        updating_input_source_data = []
         google_drive_folder_url = query_dict.get("google_drive_folder_url")
+        max_workers = query_dict.get("upload_max_workers") or UPLOAD_MAX_WORKERS
+        folder_index = new_drive_folder_index(query_dict, google_service)
 
-        # Store data to Google Drive
-        for row in input_source_data:
-            file_path = row.get("file_path")
-            if file_path and google_drive_folder_url:
-                uploaded_file = google_service.store_data_to_drive(file_path, google_drive_folder_url)
-                if uploaded_file:
-                    row["google_drive_uploaded_file"] = uploaded_file
-            else:
-                row["google_drive_uploaded_file"] = {}
+        # Store data to Google Drive with a bounded number of concurrent uploads
+        updating_input_source_data = []
+        pending_checkpoints = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            uploaded_files = executor.map(
+                lambda row: upload_row(row, google_drive_folder_url, google_service, folder_index),
+                input_source_data
+            )
 
-            updating_input_source_data.append(row)
+            # Merge results back in the original order, checkpointing the uploaded rows as they complete
+            try:
+                for row, uploaded_file in zip(input_source_data, uploaded_files):
+                    row["google_drive_uploaded_file"] = uploaded_file
+                    updating_input_source_data.append(row)
+                    pending_checkpoints.append(row)
+                    if mongodb_service and len(pending_checkpoints) >= UPLOAD_CHECKPOINT_INTERVAL:
+                        save_row_checkpoints(pending_checkpoints, mongodb_service)
+                        pending_checkpoints = []
+            finally:
+                if mongodb_service and pending_checkpoints:
+                    save_row_checkpoints(pending_checkpoints, mongodb_service)
+                if folder_index:
+                    query_dict["drive_uploads"] = dict(folder_index.counts)
 
         return updating_input_source_data
     except Exception as e:
         logging.error(f"Error in main_upload_output_data: {e}")
-        return {}
\ No newline at end of file
+        return {}
+
+async def main_upload_output_data_async(query_dict: dict, google_service) -> dict:
+    """
+    Async variant of main_upload_output_data, for an AsyncGoogleService.
+    """
+    try:
+        input_source_data = query_dict.get("data", [])
+        google_drive_folder_url = query_dict.get("google_drive_folder_url")
+        semaphore = asyncio.Semaphore(query_dict.get("upload_max_workers") or UPLOAD_MAX_WORKERS)
+
+        async def upload_with_limit(row):
+            async with semaphore:
+                return await upload_row_async(row, google_drive_folder_url, google_service)
+
+        # gather keeps the original order of the rows
+        uploaded_files = await asyncio.gather(*(upload_with_limit(row) for row in input_source_data))
+        for row, uploaded_file in zip(input_source_data, uploaded_files):
+            row["google_drive_uploaded_file"] = uploaded_file
+
+        return list(input_source_data)
+    except Exception as e:
+        logging.error(f"Error in main_upload_output_data: {e}")
+        return {}
+
+def new_drive_folder_index(query_dict: dict, google_service: GoogleService) -> DriveFolderIndex:
+    """
+    Return the index of the destination folder for the run, or None if it is disabled
+    """
+    google_drive_folder_url = query_dict.get("google_drive_folder_url")
+    if query_dict.get("drive_folder_index") and google_drive_folder_url:
+        return DriveFolderIndex(google_service, google_drive_folder_url)
+    return None
+
+def upload_row(row: dict, google_drive_folder_url: str, google_service: GoogleService, folder_index: DriveFolderIndex = None) -> dict:
+    """
+    Upload the generated file of a single row, return {} if there is nothing to upload or the upload failed.
+    With a folder index, a file already in the folder with the same content is not uploaded again,
+    and a file with the same name is updated in place instead of duplicated.
+    """
+    if row.get("cache_hit"):
+        # Uploaded by a previous run
+        return row.get("google_drive_uploaded_file", {})
+
+    file_path = row.get("file_path")
+    file_content = row.get("file_content")
+    if not ((file_path or file_content) and google_drive_folder_url):
+        return {}
+
+    # Compare the payload with the files already in the folder
+    file_name = file_path or row.get("output_file_name")
+    action, existing_file, md5_checksum = "create", None, None
+    if folder_index:
+        md5_checksum = payload_md5(file_path, file_content or None)
+        action, existing_file = folder_index.plan(row["output_file_name"], md5_checksum)
+        if action == "skip":
+            folder_index.record(action, existing_file, md5_checksum)
+            return {"id": existing_file["id"], "name": existing_file["name"]}
+
+    # In-memory outputs are uploaded from their bytes, spilled ones from disk
+    file_id = existing_file["id"] if existing_file else None
+    if file_content:
+        upload = partial(google_service.store_bytes_to_drive, row["output_file_name"], file_content, google_drive_folder_url, file_id=file_id)
+    else:
+        upload = partial(google_service.store_data_to_drive, file_path, google_drive_folder_url, file_id=file_id)
+
+    try:
+        uploaded_file = _upload_with_retry(upload, file_name) or {}
+    except Exception as e:
+        logging.error(f"Error uploading {file_name} to Google Drive: {e}")
+        return {}
+    if folder_index and uploaded_file:
+        folder_index.record(action, uploaded_file, md5_checksum)
+    return uploaded_file
+
+def _upload_with_retry(upload, file_name: str) -> dict:
+    """
+    Run an upload to Google Drive, retrying with exponential backoff on 429/5xx responses
+    """
+    from googleapiclient.errors import HttpError
+
+    for attempt in range(UPLOAD_MAX_RETRIES + 1):
+        try:
+            return upload()
+        except HttpError as e:
+            if e.resp.status not in RETRYABLE_HTTP_STATUSES or attempt == UPLOAD_MAX_RETRIES:
+                raise
+            delay = UPLOAD_BACKOFF_SECONDS * (2 ** attempt)
+            logging.warning(f"Retrying upload of {file_name} in {delay}s (HTTP {e.resp.status})")
+            time.sleep(delay)
+
+async def upload_row_async(row: dict, google_drive_folder_url: str, google_service) -> dict:
+    """
+    Async variant of upload_row, retrying with exponential backoff on 429/5xx responses
+    """
+    if row.get("cache_hit"):
+        # Uploaded by a previous run
+        return row.get("google_drive_uploaded_file", {})
+
+    file_path = row.get("file_path")
+    file_content = row.get("file_content")
+    if not ((file_path or file_content) and google_drive_folder_url):
+        return {}
+
+    from googleapiclient.errors import HttpError
+
+    file_name = file_path or row.get("output_file_name")
+    for attempt in range(UPLOAD_MAX_RETRIES + 1):
+        try:
+            if file_content:
+                return await google_service.store_bytes_to_drive(row["output_file_name"], file_content, google_drive_folder_url) or {}
+            return await google_service.store_data_to_drive(file_path, google_drive_folder_url) or {}
+        except HttpError as e:
+            if e.resp.status not in RETRYABLE_HTTP_STATUSES or attempt == UPLOAD_MAX_RETRIES:
+                logging.error(f"Error uploading {file_name} to Google Drive: {e}")
+                return {}
+            delay = UPLOAD_BACKOFF_SECONDS * (2 ** attempt)
+            logging.warning(f"Retrying upload of {file_name} in {delay}s (HTTP {e.resp.status})")
+            await asyncio.sleep(delay)
+        except Exception as e:
+            logging.error(f"Error uploading {file_name} to Google Drive: {e}")
+            return {}
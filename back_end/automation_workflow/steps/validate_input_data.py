@@ -1,6 +1,9 @@
 import logging
 
-from back_end.automation_workflow.steps.shared.common import ACCEPTABLE_COLUMNS
+from back_end.automation_workflow.steps.shared.validation_schema import compile_schema, SCHEMA_TYPES
+
+# Validation rules compiled once from the configured schema
+VALIDATION_SCHEMA = compile_schema()
 
 def main_validate_input_data(query_dict: dict) -> dict:
     """
@@ -8,48 +11,96 @@ def main_validate_input_data(query_dict: dict) -> dict:
     """
     try:
         input_source_data = query_dict.get("data", [])
-        updating_input_source_data = []
-
-        # Get rows from input source data
-        rows = query_dict.get("data", [])
-
-        # Validate each row
-        for idx, row in enumerate(input_source_data):
-            errors = _validate_row(row)
-            if errors:
-                row["validation"] = False
-                invalid_message = f"\n - Row {idx} has errors: {errors}"
-                row["invalid_message"] = invalid_message
-            else:
-                row["validation"] = True
-                row["invalid_message"] = ""
-                
-            updating_input_source_data.append(row)
-
-        return updating_input_source_data
+
+        # Validate the whole sheet at once over a DataFrame
+        if query_dict.get("vectorized_validation"):
+            return validate_rows_batch(input_source_data)
+
+        # Validate each row, detecting duplicates with a hash index over the sheet
+        seen_values = {}
+        return [validate_row_data(idx, row, seen_values) for idx, row in enumerate(input_source_data)]
     except Exception as e:
         logging.error(f"Error in main_validate_input_data: {e}")
         return {}
 
-def _validate_row(row_dict: dict) -> list:
+def validate_rows_batch(rows: list, indexes: list = None, seen_values: dict = None) -> list:
+    """
+    Validate a batch of rows with vectorised column checks over a DataFrame.
+    Produce the same validation/invalid_message fields as validate_row_data: error messages are
+    only built, by the compiled column checkers, for the cells that failed. indexes are the row
+    numbers used in the messages, seen_values is the duplicate index shared between batches.
+    """
+    if not rows:
+        return []
+    # pandas is only needed by vectorized validation, it is imported on first use
+    import numpy as np
+    import pandas as pd
+
+    indexes = indexes if indexes is not None else range(len(rows))
+    seen_values = seen_values if seen_values is not None else {}
+    columns = VALIDATION_SCHEMA.columns
+    # Built column by column, rows are RowRecords or dicts
+    df = pd.DataFrame({column: [row.get(column) for row in rows] for column in columns})
+
+    # 1. Vectorised missing, type, enum, length and regex checks per column
+    failed_columns = {}
+    for column, spec in columns.items():
+        values = df[column]
+        # Same truthiness test as the compiled checkers: None, "", 0 and False are missing
+        missing = (values.isna() | values.map(lambda value: not value)).to_numpy(dtype=bool)
+        invalid = np.zeros(len(rows), dtype=bool)
+        if "type" in spec:
+            invalid |= ~values.map(lambda value: isinstance(value, SCHEMA_TYPES[spec["type"]])).to_numpy(dtype=bool)
+        text = values.astype(str)
+        if "enum" in spec:
+            invalid |= ~text.str.lower().isin([v.lower() for v in spec["enum"]]).to_numpy(dtype=bool)
+        if "min_length" in spec or "max_length" in spec:
+            lengths = text.str.len()
+            invalid |= ~lengths.between(spec.get("min_length", 0), spec.get("max_length", float("inf"))).to_numpy(dtype=bool)
+        if "regex" in spec:
+            invalid |= ~text.str.contains(spec["regex"], regex=True).to_numpy(dtype=bool)
+        failed = (missing & spec.get("required", True)) | (~missing & invalid)
+        if failed.any():
+            failed_columns[column] = failed
+
+    # 2. Record the results; duplicates and cross-column rules use the compiled checkers
+    unique_columns = VALIDATION_SCHEMA.unique_columns
+    for position, (idx, row) in enumerate(zip(indexes, rows)):
+        errors = []
+        for column, check_column in VALIDATION_SCHEMA.column_checkers.items():
+            value = row.get(column, "")
+            if column in failed_columns and failed_columns[column][position]:
+                error = check_column(value)
+                if error:
+                    errors.append(error)
+            if column in unique_columns and value:
+                first_idx = seen_values.setdefault(column, {}).setdefault(value, idx)
+                if first_idx != idx:
+                    errors.append(f"Duplicate value for '{column}': {value} (first seen in row {first_idx})")
+        for rule_checker in VALIDATION_SCHEMA.rule_checkers:
+            error = rule_checker(row)
+            if error:
+                errors.append(error)
+
+        if errors:
+            row["validation"] = False
+            row["invalid_message"] = f"\n - Row {idx} has errors: {errors}"
+        else:
+            row["validation"] = True
+            row["invalid_message"] = ""
+    return rows
+
+def validate_row_data(idx: int, row: dict, seen_values: dict = None) -> dict:
     """
-    Validate a single row of input data
+    Validate a single row and record the result in its validation fields.
+    Pass the same seen_values dict for every row of a sheet to detect duplicates.
     """
-    errors = []
-    for column, value_constraint in ACCEPTABLE_COLUMNS.items():
-        value = row_dict.get(column, "")
-
-        # Empty value check
-        if not value:
-            errors.append(f"Missing value for '{column}'")
-            continue
-
-        # Type and value checks
-        if isinstance(value_constraint, type):
-            if not isinstance(value, value_constraint):
-                errors.append(f"Invalid type for '{column}': expected {value_constraint.__name__}, got {type(value).__name__}")
-        elif isinstance(value_constraint, list):
-            if value.lower() not in [v.lower() for v in value_constraint]:
-                errors.append(f"Invalid value for '{column}': expected one of {value_constraint}, got {value}")
-
-    return errors
\ No newline at end of file
+    errors = VALIDATION_SCHEMA.validate_row(row, seen_values, idx)
+    if errors:
+        row["validation"] = False
+        invalid_message = f"\n - Row {idx} has errors: {errors}"
+        row["invalid_message"] = invalid_message
+    else:
+        row["validation"] = True
+        row["invalid_message"] = ""
+    return row
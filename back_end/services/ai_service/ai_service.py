@@ -0,0 +1,118 @@
+import os
+import time
+import random
+import threading
+
+# Provider settings, keyed by the lowercase "Model Specification" of a row
+AI_PROVIDER_SETTINGS = {
+    "openai": {"model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"), "rate": 5, "burst": 5, "max_concurrency": 8},
+    "claude": {"model": os.getenv("ANTHROPIC_MODEL", "claude-3-5-haiku-latest"), "rate": 2, "burst": 2, "max_concurrency": 4},
+}
+MAX_OUTPUT_TOKENS = 1024
+
+class ProviderRateLimitError(Exception):
+    """
+    Raised by a provider when the API rejected a request because of rate limits
+    """
+
+class AIProvider:
+    """
+    Interface of a content generation backend
+    """
+    supports_batch = False # Whether generate_batch sends several prompts in one request
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def generate_batch(self, prompts: list) -> list:
+        return [self.generate(prompt) for prompt in prompts]
+
+class OpenAIProvider(AIProvider):
+    def __init__(self, model: str = AI_PROVIDER_SETTINGS["openai"]["model"]):
+        from openai import OpenAI
+        self.client = OpenAI() # Reads OPENAI_API_KEY
+        self.model = model
+
+    def generate(self, prompt: str) -> str:
+        import openai
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=MAX_OUTPUT_TOKENS,
+            )
+        except openai.RateLimitError as e:
+            raise ProviderRateLimitError(str(e)) from e
+        return response.choices[0].message.content
+
+class ClaudeProvider(AIProvider):
+    def __init__(self, model: str = AI_PROVIDER_SETTINGS["claude"]["model"]):
+        from anthropic import Anthropic
+        self.client = Anthropic() # Reads ANTHROPIC_API_KEY
+        self.model = model
+
+    def generate(self, prompt: str) -> str:
+        import anthropic
+        try:
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=MAX_OUTPUT_TOKENS,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except anthropic.RateLimitError as e:
+            raise ProviderRateLimitError(str(e)) from e
+        return "".join(block.text for block in response.content if block.type == "text")
+
+class StubProvider(AIProvider):
+    """
+    Local stand-in for the APIs, with configurable latency, rate-limit rate and batch support
+    """
+    def __init__(self, name: str = "stub", latency: float = 0.1, rate_limit_probability: float = 0.0, supports_batch: bool = False):
+        self.name = name
+        self.latency = latency
+        self.rate_limit_probability = rate_limit_probability
+        self.supports_batch = supports_batch
+        self.calls = 0
+        self.calls_lock = threading.Lock() # generate_batch is called from the scheduler's worker threads
+
+    def generate(self, prompt: str) -> str:
+        return self.generate_batch([prompt])[0]
+
+    def generate_batch(self, prompts: list) -> list:
+        with self.calls_lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if random.random() < self.rate_limit_probability:
+            raise ProviderRateLimitError(f"{self.name} stub rate limit")
+        return [f"[{self.name}] generated content for: {prompt[:80]}" for prompt in prompts]
+
+def create_provider(provider_name: str) -> AIProvider:
+    """
+    Create the real provider for a "Model Specification" (case-insensitive)
+    """
+    provider_name = provider_name.lower()
+    if provider_name == "openai":
+        return OpenAIProvider()
+    elif provider_name == "claude":
+        return ClaudeProvider()
+    raise ValueError(f"Unknown AI provider: {provider_name}")
+
+def get_prompt_inputs(row: dict) -> dict:
+    """
+    Extract the row values that the generation prompt depends on
+    """
+    return {
+        "description": row.get("Description", ""),
+        "assets": row.get("Assets", ""),
+        "output_format": str(row.get("Output Format", "")).upper(),
+    }
+
+def build_prompt(prompt_inputs: dict) -> str:
+    """
+    Build the generation prompt from the prompt inputs of a row
+    """
+    return (
+        f"Create content in {prompt_inputs['output_format']} format.\n"
+        f"Description: {prompt_inputs['description']}\n"
+        f"Reference assets: {prompt_inputs['assets']}"
+    )
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+MEMO_MAX_ENTRIES = 10000
+MEMO_TTL_SECONDS = 7 * 24 * 60 * 60
+MEMO_SQLITE_PATH = os.getenv("GENERATION_MEMO_SQLITE_PATH") # Persistent tier, disabled when unset
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU with a time to live per entry
+    """
+    def __init__(self, max_entries: int = MEMO_MAX_ENTRIES, ttl_seconds: float = MEMO_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict() # key -> (stored_at, value)
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.ttl_seconds:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value) -> None:
+        with self.lock:
+            self.entries[key] = (time.time(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+class SQLiteCache:
+    """
+    Persistent tier stored in a SQLite file, with the same TTL and size eviction as the LRU
+    """
+    def __init__(self, path: str, max_entries: int = MEMO_MAX_ENTRIES, ttl_seconds: float = MEMO_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS generation_memo (key TEXT PRIMARY KEY, value TEXT, used_at REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS generation_memo_used_at ON generation_memo (used_at)")
+
+    def get(self, key: str):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM generation_memo WHERE key = ? AND used_at >= ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE generation_memo SET used_at = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+            return json.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO generation_memo (key, value, used_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time())
+            )
+            # Evict expired entries, then the least recently used ones above max_entries
+            self.connection.execute("DELETE FROM generation_memo WHERE used_at < ?", (time.time() - self.ttl_seconds,))
+            self.connection.execute(
+                "DELETE FROM generation_memo WHERE key IN (SELECT key FROM generation_memo ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.connection.commit()
+
+class GenerationMemo:
+    """
+    Two-tier memoization of generated content, with deduplication of identical requests in flight
+    """
+    def __init__(self, sqlite_path: str = MEMO_SQLITE_PATH):
+        self.memory = LRUCache()
+        self.persistent = SQLiteCache(sqlite_path) if sqlite_path else None
+        self.in_flight = {} # key -> threading.Event set once the owner finished generating
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, count_lookup: bool = True):
+        value = self.memory.get(key)
+        if value is None and self.persistent:
+            value = self.persistent.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        if not count_lookup:
+            return value
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value) -> None:
+        self.memory.set(key, value)
+        if self.persistent:
+            self.persistent.set(key, value)
+
+    def claim(self, key: str):
+        """
+        Claim a key before generating it.
+        Return None if the caller now owns the key, or the Event to wait on if another request is generating it.
+        """
+        with self.lock:
+            if key in self.in_flight:
+                return self.in_flight[key]
+            self.in_flight[key] = threading.Event()
+            return None
+
+    def release(self, key: str) -> None:
+        """
+        Wake up the requests waiting for a claimed key
+        """
+        with self.lock:
+            event = self.in_flight.pop(key, None)
+        if event:
+            event.set()
+
+def memo_key(model: str, prompt_inputs: dict) -> str:
+    """
+    Hash of the model and the normalized prompt inputs: whitespace is collapsed, case is kept
+    """
+    normalized = {name: " ".join(str(value).split()) for name, value in prompt_inputs.items()}
+    return hashlib.sha256(json.dumps([model, normalized], sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
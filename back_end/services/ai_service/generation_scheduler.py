@@ -0,0 +1,169 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from back_end.services.rate_limiter import RateLimiter
+from back_end.services.ai_service.ai_service import AI_PROVIDER_SETTINGS, ProviderRateLimitError, create_provider, build_prompt, get_prompt_inputs
+from back_end.services.ai_service.generation_memo import GenerationMemo, memo_key
+
+GENERATION_BATCH_SIZE = 20 # Prompts per request for providers that support batching
+GENERATION_MAX_RETRIES = 5
+GENERATION_BACKOFF_SECONDS = 1
+
+# Limits and the memo are shared by every scheduler of the process
+_PROVIDER_LIMITS = {} # (provider_name, rate, burst, max_concurrency) -> (RateLimiter, Semaphore)
+_PROVIDER_LIMITS_LOCK = threading.Lock()
+_DEFAULT_MEMO = None
+
+class GenerationScheduler:
+    """
+    Run generation requests concurrently, with a token bucket and a concurrency cap per provider.
+    Identical requests are answered from the memo, or generated once and shared.
+    """
+    def __init__(self, providers: dict = None, settings: dict = AI_PROVIDER_SETTINGS, memo: GenerationMemo = None):
+        self.providers = dict(providers or {}) # provider name -> AIProvider, real providers are created on first use
+        self.settings = settings
+        self.memo = memo or _get_default_memo()
+        self.providers_lock = threading.Lock()
+
+    def generate_rows(self, rows: list) -> list:
+        """
+        Generate content for the valid rows that are not cache hits.
+        Set "generated_content" on success and "generation_error" on failure.
+        """
+        # 1. Answer rows from the memo and group the others by request key
+        rows_by_key = {}
+        for row in rows:
+            if row.get("validation") and not row.get("cache_hit"):
+                provider_name = row.get("Model Specification", "").lower()
+                prompt_inputs = get_prompt_inputs(row)
+                key = memo_key(self.settings.get(provider_name, {}).get("model", provider_name), prompt_inputs)
+                content = self.memo.get(key)
+                if content is not None:
+                    row["generated_content"] = content
+                else:
+                    rows_by_key.setdefault(key, {"provider_name": provider_name, "prompt_inputs": prompt_inputs, "rows": []})["rows"].append(row)
+
+        # 2. Generate each key once; keys already being generated by another request are waited for
+        owned_keys = {}
+        waited_keys = {}
+        for key, request in rows_by_key.items():
+            event = self.memo.claim(key)
+            if event is not None:
+                waited_keys[key] = event
+                continue
+            # Generated by another request between the memo lookup and the claim
+            content = self.memo.get(key, count_lookup=False)
+            if content is not None:
+                self.memo.release(key)
+                for row in request["rows"]:
+                    row["generated_content"] = content
+            else:
+                owned_keys[key] = request
+        try:
+            self._generate_keys(owned_keys)
+        finally:
+            for key in owned_keys:
+                self.memo.release(key)
+
+        # 3. Collect the content generated by the other requests
+        for key, event in waited_keys.items():
+            event.wait()
+            content = self.memo.get(key)
+            for row in rows_by_key[key]["rows"]:
+                if content is not None:
+                    row["generated_content"] = content
+                else:
+                    row["generation_error"] = "An identical generation request failed"
+        return rows
+
+    def _generate_keys(self, requests: dict) -> None:
+        """
+        Generate the content of the owned keys, in batches when the provider supports it
+        """
+        jobs = []
+        keys_by_provider = {}
+        for key, request in requests.items():
+            keys_by_provider.setdefault(request["provider_name"], []).append(key)
+        for provider_name, keys in keys_by_provider.items():
+            # A provider that cannot be created (unknown name, missing API key or package) only fails its own rows
+            try:
+                batch_size = GENERATION_BATCH_SIZE if self._get_provider(provider_name).supports_batch else 1
+            except Exception as e:
+                logging.error(f"Error creating the {provider_name} provider: {e}")
+                for key in keys:
+                    for row in requests[key]["rows"]:
+                        row["generation_error"] = str(e)
+                continue
+            for start in range(0, len(keys), batch_size):
+                jobs.append((provider_name, [(key, requests[key]) for key in keys[start:start + batch_size]]))
+        if not jobs:
+            return
+
+        # The per-provider limits decide how many jobs really run at once
+        max_workers = sum(self.settings.get(name, {}).get("max_concurrency", 1) for name in {provider_name for provider_name, _ in jobs})
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(lambda job: self._run_job(*job), jobs))
+
+    def _run_job(self, provider_name: str, requests: list) -> None:
+        """
+        Generate a batch of (key, request) with one provider and share the results with every row of each key
+        """
+        try:
+            provider = self._get_provider(provider_name)
+            rate_limiter, semaphore = _get_provider_limits(provider_name, self.settings.get(provider_name, {}))
+            prompts = [build_prompt(request["prompt_inputs"]) for _, request in requests]
+            with semaphore:
+                contents = self._generate_with_retry(provider, rate_limiter, prompts)
+            for (key, request), content in zip(requests, contents):
+                self.memo.set(key, content)
+                for row in request["rows"]:
+                    row["generated_content"] = content
+        except Exception as e:
+            logging.error(f"Error generating content with {provider_name}: {e}")
+            for _, request in requests:
+                for row in request["rows"]:
+                    row["generation_error"] = str(e)
+
+    def _generate_with_retry(self, provider, rate_limiter: RateLimiter, prompts: list) -> list:
+        """
+        Send the prompts, retrying with exponential backoff on rate-limit responses
+        """
+        for attempt in range(GENERATION_MAX_RETRIES + 1):
+            rate_limiter.acquire()
+            try:
+                if len(prompts) > 1:
+                    return provider.generate_batch(prompts)
+                return [provider.generate(prompts[0])]
+            except ProviderRateLimitError:
+                if attempt == GENERATION_MAX_RETRIES:
+                    raise
+                time.sleep(GENERATION_BACKOFF_SECONDS * (2 ** attempt))
+
+    def _get_provider(self, provider_name: str):
+        with self.providers_lock:
+            if provider_name not in self.providers:
+                self.providers[provider_name] = create_provider(provider_name)
+            return self.providers[provider_name]
+
+def _get_provider_limits(provider_name: str, settings: dict) -> tuple:
+    """
+    Return the process-wide (RateLimiter, Semaphore) of a provider and its settings,
+    schedulers configured with different limits for a provider do not share them
+    """
+    key = (provider_name, settings.get("rate", 1), settings.get("burst", 1), settings.get("max_concurrency", 1))
+    with _PROVIDER_LIMITS_LOCK:
+        if key not in _PROVIDER_LIMITS:
+            _PROVIDER_LIMITS[key] = (RateLimiter(key[1], key[2]), threading.BoundedSemaphore(key[3]))
+        return _PROVIDER_LIMITS[key]
+
+def _get_default_memo() -> GenerationMemo:
+    """
+    Return the process-wide memo, created on first use
+    """
+    global _DEFAULT_MEMO
+    with _PROVIDER_LIMITS_LOCK:
+        if _DEFAULT_MEMO is None:
+            _DEFAULT_MEMO = GenerationMemo()
+        return _DEFAULT_MEMO
@@ -0,0 +1,32 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from back_end.services.google_service.google_service import GoogleService
+
+# Google client calls are blocking, they run on a shared executor so the event loop stays free
+GOOGLE_EXECUTOR_MAX_WORKERS = 16
+
+class AsyncGoogleService:
+    # Created with the class so concurrent first calls cannot race, the worker threads only start on the first call
+    _executor = ThreadPoolExecutor(max_workers=GOOGLE_EXECUTOR_MAX_WORKERS, thread_name_prefix="google_service")
+
+    def __init__(self, google_service: GoogleService = None):
+        self.google_service = google_service or GoogleService()
+
+    async def get_data_from_sheets(self, google_sheets_url) -> dict:
+        return await self._run(self.google_service.get_data_from_sheets, google_sheets_url)
+
+    async def store_data_to_drive(self, file_path, google_drive_folder_path):
+        return await self._run(self.google_service.store_data_to_drive, file_path, google_drive_folder_path)
+
+    async def store_bytes_to_drive(self, file_name, data, google_drive_folder_path):
+        return await self._run(self.google_service.store_bytes_to_drive, file_name, data, google_drive_folder_path)
+
+    async def send_email(self, email_address, subject, body):
+        return await self._run(self.google_service.send_email, email_address, subject, body)
+
+    async def _run(self, function, *args):
+        """
+        Run a blocking GoogleService call on the shared executor
+        """
+        return await asyncio.get_running_loop().run_in_executor(AsyncGoogleService._executor, function, *args)
@@ -0,0 +1,76 @@
+import hashlib
+import logging
+import threading
+
+from back_end.services.google_service.google_service import GoogleService
+
+class DriveFolderIndex:
+    """
+    Files of the destination Drive folder by name, listed once per run on first use.
+    Decides for every generated payload whether to skip the upload (same name and md5Checksum),
+    update the existing file in place or create a new one, and counts the decisions.
+    If the folder cannot be listed, every payload is created as before.
+    The listing is a snapshot: a file another writer creates in the folder afterwards is not seen, and a payload
+    with the same name is created a second time. The job queue and the batch runner therefore run the jobs
+    targeting the same folder one after the other; other writers (another batch, manual uploads) can still race.
+    """
+    def __init__(self, google_service: GoogleService, google_drive_folder_url: str) -> None:
+        self.google_service = google_service
+        self.google_drive_folder_url = google_drive_folder_url
+        self.files = None # name -> files of the folder with that name, the most recently modified first
+        self.lock = threading.Lock()
+        self.counts = {"skipped": 0, "updated": 0, "created": 0}
+
+    def plan(self, file_name: str, md5_checksum: str) -> tuple:
+        """
+        Return ("skip", existing_file), ("update", existing_file) or ("create", None) for a payload
+        """
+        files = self._get_files().get(file_name, [])
+        for existing_file in files:
+            if existing_file.get("md5Checksum") == md5_checksum:
+                return "skip", existing_file
+        if files:
+            return "update", files[0]
+        return "create", None
+
+    def record(self, action: str, uploaded_file: dict, md5_checksum: str) -> None:
+        """
+        Count a decision and index the uploaded file, so a later payload with the same name finds it
+        """
+        with self.lock:
+            self.counts[{"skip": "skipped", "update": "updated", "create": "created"}[action]] += 1
+            if action != "skip" and uploaded_file.get("name"):
+                files = [existing_file for existing_file in self.files.get(uploaded_file["name"], []) if existing_file["id"] != uploaded_file.get("id")]
+                self.files[uploaded_file["name"]] = [{**uploaded_file, "md5Checksum": md5_checksum}] + files
+
+    def _get_files(self) -> dict:
+        """
+        List the folder on first use, the uploads of the run then keep the index current
+        """
+        with self.lock:
+            if self.files is None:
+                self.files = {}
+                try:
+                    for existing_file in self.google_service.list_drive_folder(self.google_drive_folder_url):
+                        self.files.setdefault(existing_file["name"], []).append(existing_file)
+                except Exception as e:
+                    logging.error(f"Error listing the Google Drive folder, uploading every file: {e}")
+            return self.files
+
+def drive_folder_id(google_drive_folder_url: str) -> str:
+    """
+    Return the id of a Drive folder from its URL (or id), the way GoogleService resolves it
+    """
+    return (google_drive_folder_url or "").split('/')[-1]
+
+def payload_md5(file_path: str = None, file_content: bytes = None) -> str:
+    """
+    Return the MD5 hex digest of an in-memory payload or of a file, as Drive reports it in md5Checksum
+    """
+    if file_content is not None:
+        return hashlib.md5(file_content).hexdigest()
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
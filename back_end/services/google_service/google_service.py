@@ -1,13 +1,13 @@
+import io
 import os
 import pickle
 import base64
-from google.auth.transport.requests import Request
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google_auth_oauthlib.flow import InstalledAppFlow
+import threading
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 
+from back_end.services.rate_limiter import RateLimiter
+
 SERVICE_ACCOUNT_FILE = "back_end\\services\\google_service\\configs\\automation-workflow-project-73a3cbdd2942.json"
 CLIENT_SECRET_FILE = "back_end\\services\\google_service\\configs\\client_secret_608833324413-fkq10e04u2pht5ksua1rm7j6bjtpeduo.apps.googleusercontent.com.json"
 SCOPES = [
@@ -16,36 +16,131 @@ SCOPES = [
     "https://www.googleapis.com/auth/gmail.send"
 ]
 SERVICES_USE_O2AUTH = ["drive", "gmail"] 
+SHEETS_CHUNK_ROWS = 1000 # Rows per range when paging through a sheet
+SHEETS_RANGES_PER_REQUEST = 10 # Row ranges fetched by a single batchGet call
+DRIVE_LIST_PAGE_SIZE = 1000 # Files per page when listing a Drive folder, the maximum allowed
+GMAIL_BATCH_SIZE = 50 # Messages per Gmail batch request, larger batches get rate limited
+
+# Process-wide caches shared by every GoogleService instance
+_CREDENTIALS_CACHE = {}
+_CREDENTIALS_LOCK = threading.Lock()
+_SERVICE_CACHE = threading.local() # Built clients are not thread-safe, keep one per thread
+_RATE_LIMITERS = {} # api_name -> RateLimiter, shared by every thread of the process
+
+def set_rate_limit(api_name: str, rate: float, burst: int = 1) -> None:
+    """
+    Limit the requests per second of a Google API across the whole process, None removes the limit
+    """
+    if rate:
+        _RATE_LIMITERS[api_name] = RateLimiter(rate, burst)
+    else:
+        _RATE_LIMITERS.pop(api_name, None)
+
+@contextmanager
+def google_rate_limits(rate_limits: dict):
+    """
+    Apply {api_name: requests per second} while the block runs, then restore the previous limiters
+    """
+    previous_limiters = {api_name: _RATE_LIMITERS.get(api_name) for api_name in rate_limits}
+    for api_name, rate in rate_limits.items():
+        set_rate_limit(api_name, rate)
+    try:
+        yield
+    finally:
+        for api_name, rate_limiter in previous_limiters.items():
+            if rate_limiter:
+                _RATE_LIMITERS[api_name] = rate_limiter
+            else:
+                _RATE_LIMITERS.pop(api_name, None)
 
 class GoogleService:
     def get_data_from_sheets(self, google_sheets_url) -> dict   :
         """        
         Get data from Google Sheets
         """
-        # Preparation
+        metadata = self.get_sheet_metadata(google_sheets_url)
+        return {
+            "data": list(self.iter_data_from_sheets(google_sheets_url, metadata=metadata)),
+            "file_name": metadata["file_name"],
+            "sheet_name": metadata["sheet_name"]
+        }
+
+    def get_sheet_metadata(self, google_sheets_url) -> dict:
+        """
+        Get the file name, first sheet name and real grid size of a spreadsheet
+        """
         service = self._get_service('sheets', 'v4')
         spreadsheet_id = google_sheets_url.split('/d/')[1].split('/')[0]
-        range_name = 'Sheet1!A1:Z1000'
 
-        # Get spreadsheet metadata (file name and sheet names)
-        sheet = service.spreadsheets()
-        metadata = sheet.get(spreadsheetId=spreadsheet_id).execute()
-        file_name = metadata.get('properties', {}).get('title', None)
+        # Get spreadsheet metadata (file name, sheet names and grid sizes)
+        metadata = self._execute('sheets', service.spreadsheets().get(spreadsheetId=spreadsheet_id))
         sheets = metadata.get('sheets', [])
-        sheet_name = sheets[0]['properties']['title'] if sheets else None
-        range_name = f'{sheet_name}!A1:Z1000' if sheet_name else 'Sheet1!A1:Z1000'
-        # Fetch data
-        result = sheet.values().get(spreadsheetId=spreadsheet_id, range=range_name).execute()
-        data = result.get('values', [])
+        sheet_properties = sheets[0]['properties'] if sheets else {}
+        grid_properties = sheet_properties.get('gridProperties', {})
         return {
-            "data": data,
-            "file_name": file_name,
-            "sheet_name": sheet_name
+            "spreadsheet_id": spreadsheet_id,
+            "file_name": metadata.get('properties', {}).get('title', None),
+            "sheet_name": sheet_properties.get('title', None),
+            "row_count": grid_properties.get('rowCount', 1000),
+            "column_count": grid_properties.get('columnCount', 26),
         }
 
-    def store_data_to_drive(self, file_path, google_drive_folder_path):
+    def iter_data_from_sheets(self, google_sheets_url, chunk_rows=SHEETS_CHUNK_ROWS, metadata=None):
+        """
+        Yield the rows of the first sheet, header included, paging through the grid with batchGet.
+        Like a read of the whole sheet, empty rows are kept where a later row has values and dropped at the end.
+        """
+        metadata = metadata or self.get_sheet_metadata(google_sheets_url)
+        service = self._get_service('sheets', 'v4')
+        # Quotes are doubled inside a quoted sheet name in A1 notation
+        sheet_name = (metadata["sheet_name"] or 'Sheet1').replace("'", "''")
+        last_column = _column_letter(metadata["column_count"])
+        row_count = metadata["row_count"]
+
+        # Each request fetches several row chunks at once
+        chunk_starts = list(range(1, row_count + 1, chunk_rows))
+        empty_rows = 0 # Empty rows read but not yielded yet, they are dropped if no row with values follows
+        for i in range(0, len(chunk_starts), SHEETS_RANGES_PER_REQUEST):
+            starts = chunk_starts[i:i + SHEETS_RANGES_PER_REQUEST]
+            ranges = [f"'{sheet_name}'!A{start}:{last_column}{min(start + chunk_rows - 1, row_count)}" for start in starts]
+            result = self._execute('sheets', service.spreadsheets().values().batchGet(spreadsheetId=metadata["spreadsheet_id"], ranges=ranges))
+            for start, value_range in zip(starts, result.get('valueRanges', [])):
+                # The API drops the trailing empty rows of each range
+                values = value_range.get('values', [])
+                for row in values:
+                    if not row:
+                        empty_rows += 1
+                        continue
+                    for _ in range(empty_rows):
+                        yield []
+                    empty_rows = 0
+                    yield row
+                empty_rows += min(start + chunk_rows - 1, row_count) - start + 1 - len(values)
+
+    def list_drive_folder(self, google_drive_folder_path):
         """
-        Store data to Google Drive
+        List the files of a Google Drive folder with their id, name and md5Checksum, the most recently modified first
+        """
+        service = self._get_service('drive', 'v3')
+        folder_id = google_drive_folder_path.split('/')[-1]
+        files = []
+        page_token = None
+        while True:
+            response = self._execute('drive', service.files().list(
+                q=f"'{folder_id}' in parents and trashed = false",
+                fields='nextPageToken, files(id, name, md5Checksum)',
+                orderBy='modifiedTime desc',
+                pageSize=DRIVE_LIST_PAGE_SIZE,
+                pageToken=page_token
+            ))
+            files.extend(response.get('files', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return files
+
+    def store_data_to_drive(self, file_path, google_drive_folder_path, file_id=None):
+        """
+        Store data to Google Drive, replacing the content of file_id if given
         """
         # Preparation
         service = self._get_service('drive', 'v3')
@@ -54,62 +149,146 @@ class GoogleService:
             'name': os.path.basename(file_path),
             'parents': [folder_id]
         }
+        from googleapiclient.http import MediaFileUpload
+
         media = MediaFileUpload(file_path, resumable=True)
         
         # Upload file
-        uploaded_file = service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id, name'
-        ).execute()
+        uploaded_file = self._execute('drive', _upload_request(service, file_metadata, media, file_id))
 
         # Result
         return uploaded_file
     
-    def send_email(self, email_address, subject, body):
+    def store_bytes_to_drive(self, file_name, data, google_drive_folder_path, mimetype='application/json', file_id=None):
         """
-        Send email notification
+        Store in-memory data to Google Drive without going through a temp file, replacing the content of file_id if given
         """
-        service = self._get_service('gmail', 'v1')
+        # Preparation
+        service = self._get_service('drive', 'v3')
+        folder_id = google_drive_folder_path.split('/')[-1] if google_drive_folder_path else None
+        file_metadata = {
+            'name': file_name,
+            'parents': [folder_id]
+        }
+        from googleapiclient.http import MediaIoBaseUpload
+
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mimetype, resumable=False)
 
-        # Prepare the email
-        to = email_address
-        subject = subject
-        body = body
+        # Upload file
+        uploaded_file = self._execute('drive', _upload_request(service, file_metadata, media, file_id))
 
-        message = MIMEText(body, 'html')
-        message['to'] = to
-        message['subject'] = subject
+        # Result
+        return uploaded_file
 
-        # Encode the message
-        raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
+    def send_email(self, email_address, subject, body):
+        """
+        Send email notification
+        """
+        service = self._get_service('gmail', 'v1')
 
         # Send the email
-        sent_message = service.users().messages().send(
+        sent_message = self._execute('gmail', service.users().messages().send(
             userId="me",
-            body={'raw': raw_message}
-        ).execute()
+            body={'raw': _raw_message(email_address, subject, body)}
+        ))
         
         return sent_message
 
+    def send_emails(self, messages):
+        """
+        Send several emails through the Gmail batch endpoint, GMAIL_BATCH_SIZE per HTTP request.
+        messages: list of (email_address, subject, body). Return one (sent_message, error) tuple per message.
+        A batch request that fails only fails its own messages, the messages of the other batches keep their result.
+        """
+        service = self._get_service('gmail', 'v1')
+        results = [({}, None)] * len(messages)
+
+        def callback(request_id, response, exception):
+            results[int(request_id)] = (response or {}, exception)
+
+        for start in range(0, len(messages), GMAIL_BATCH_SIZE):
+            indexes = range(start, min(start + GMAIL_BATCH_SIZE, len(messages)))
+            batch = service.new_batch_http_request(callback=callback)
+            for idx in indexes:
+                batch.add(
+                    service.users().messages().send(userId="me", body={'raw': _raw_message(*messages[idx])}),
+                    request_id=str(idx)
+                )
+            try:
+                self._execute('gmail', batch)
+            except Exception as e:
+                for idx in indexes:
+                    results[idx] = ({}, e)
+
+        return results
+
+    def _execute(self, api_name, request):
+        """
+        Execute an API request, waiting for the rate limit of the API if one is set
+        """
+        rate_limiter = _RATE_LIMITERS.get(api_name)
+        if rate_limiter:
+            rate_limiter.acquire()
+        return request.execute()
+
     def _get_service(self, api_name, api_version):
         """
-        Get Google API service instance with token caching
+        Get Google API service instance, cached by (api_name, api_version) for the current thread
         """
-        # Create credentials
-        creds = self._load_credentials(api_name)
+        services = getattr(_SERVICE_CACHE, "services", None)
+        if services is None:
+            services = _SERVICE_CACHE.services = {}
+
+        # Reuse the built client while its credentials are still valid
+        creds = self._get_credentials(api_name)
+        cached = services.get((api_name, api_version))
+        if cached and cached["credentials"] is creds:
+            return cached["service"]
+
+        # Build the service from the discovery documents bundled with the client library.
+        # The Google client libraries are imported on first use, they dominate the import time of the package.
+        from googleapiclient.discovery import build
 
-        # Build the service
         if not creds:
-            service = build(api_name, api_version)
+            service = build(api_name, api_version, static_discovery=True)
         else:
-            service = build(api_name, api_version, credentials=creds)
+            service = build(api_name, api_version, credentials=creds, static_discovery=True)
+        services[(api_name, api_version)] = {"service": service, "credentials": creds}
         return service
 
+    def _get_credentials(self, api_name):
+        """
+        Get credentials from the process-wide cache, refreshing them only when they are near expiry
+        """
+        cache_key = "oauth" if api_name in SERVICES_USE_O2AUTH else "service_account"
+        with _CREDENTIALS_LOCK:
+            creds = _CREDENTIALS_CACHE.get(cache_key)
+            if creds is None:
+                creds = self._load_credentials(api_name)
+            elif cache_key == "oauth" and creds.expired and creds.refresh_token:
+                from google.auth.transport.requests import Request
+
+                creds.refresh(Request())
+                self._save_token(creds)
+            _CREDENTIALS_CACHE[cache_key] = creds
+        return creds
+
+    def _save_token(self, creds):
+        """
+        Persist OAuth credentials to the token file
+        """
+        token_file = os.path.join("back_end/services/google_service/configs", "token.pickle")
+        with open(token_file, 'wb') as token:
+            pickle.dump(creds, token)
+
     def _load_credentials(self, api_name):
         """
         Load credentials from a file
         """
+        from google.auth.transport.requests import Request
+        from google.oauth2.service_account import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
         creds = None
 
         if api_name in SERVICES_USE_O2AUTH:
@@ -134,4 +313,32 @@ class GoogleService:
         else:
             creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
             
-        return creds
\ No newline at end of file
+        return creds
+
+
+def _upload_request(service, file_metadata: dict, media, file_id: str = None):
+    """
+    Build the request creating a file in its folder, or updating the content of file_id in place
+    """
+    if file_id:
+        return service.files().update(fileId=file_id, media_body=media, fields='id, name')
+    return service.files().create(body=file_metadata, media_body=media, fields='id, name')
+
+def _raw_message(email_address: str, subject: str, body: str) -> str:
+    """
+    Encode an HTML email for the Gmail API
+    """
+    message = MIMEText(body, 'html')
+    message['to'] = email_address
+    message['subject'] = subject
+    return base64.urlsafe_b64encode(message.as_bytes()).decode()
+
+def _column_letter(column_number: int) -> str:
+    """
+    Convert a 1-based column number to its A1 notation letter (1 -> A, 27 -> AA)
+    """
+    letters = ""
+    while column_number > 0:
+        column_number, remainder = divmod(column_number - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
@@ -0,0 +1,243 @@
+import os
+import time
+import uuid
+import atexit
+import sqlite3
+import logging
+import tempfile
+import threading
+from datetime import datetime
+
+from back_end.services.google_service.google_service import GoogleService
+
+# Messages survive a restart of the process, the ones still queued are sent by the next outbox
+MAIL_OUTBOX_SQLITE_PATH = os.getenv("MAIL_OUTBOX_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "automation_workflow_outbox.sqlite"))
+MAIL_COALESCE_WINDOW_SECONDS = float(os.getenv("MAIL_COALESCE_WINDOW_SECONDS", "60")) # Messages to a recipient within the window are sent as one digest
+MAIL_FLUSH_INTERVAL_SECONDS = 5
+MAIL_MAX_ATTEMPTS = 5
+MAIL_RETRY_BACKOFF_SECONDS = 30
+MAIL_RETENTION_SECONDS = 7 * 24 * 60 * 60
+FINISHED_MAIL_STATUSES = ["Sent", "Failed", "Superseded"]
+
+_MAIL_OUTBOX = None
+_MAIL_OUTBOX_LOCK = threading.Lock()
+
+class MailOutbox:
+    """
+    Emails queued in a SQLite file and sent in the background.
+    The queued messages of a recipient are coalesced into a single digest once the oldest one is
+    MAIL_COALESCE_WINDOW_SECONDS old, and every digest of a flush goes out in one Gmail batch request.
+    Message status: Queued, Sending, (Sent, Failed or Superseded by a newer daily report).
+    """
+    def __init__(
+        self,
+        google_service: GoogleService = None,
+        path: str = MAIL_OUTBOX_SQLITE_PATH,
+        coalesce_window_seconds: float = MAIL_COALESCE_WINDOW_SECONDS
+    ) -> None:
+        self.google_service = google_service or GoogleService()
+        self.coalesce_window_seconds = coalesce_window_seconds
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock() # One flush at a time, so a message is never sent twice
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Autocommit mode, claims use an explicit transaction
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id TEXT PRIMARY KEY,
+                recipient TEXT,
+                kind TEXT,
+                subject TEXT,
+                body TEXT,
+                status TEXT,
+                attempts INTEGER,
+                error_message TEXT,
+                gmail_message_id TEXT,
+                digest_id TEXT,
+                created_at REAL,
+                send_after REAL,
+                sent_at REAL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS messages_status_recipient ON messages (status, recipient)")
+
+    def enqueue(self, email_address: str, subject: str, body: str, kind: str = "notification") -> dict:
+        """
+        Queue an email, return {"id": message_id, "status": "Queued"}.
+        A queued daily report replaces the previous one of the same recipient, only the latest is worth reading.
+        """
+        message_id = uuid.uuid4().hex
+        now = time.time()
+        with self.lock:
+            if kind == "daily_report":
+                self.connection.execute(
+                    "UPDATE messages SET status = 'Superseded' WHERE status = 'Queued' AND kind = 'daily_report' AND recipient = ?",
+                    (email_address,)
+                )
+            self.connection.execute(
+                "INSERT INTO messages (id, recipient, kind, subject, body, status, attempts, error_message, created_at, send_after) "
+                "VALUES (?, ?, ?, ?, ?, 'Queued', 0, '', ?, ?)",
+                (message_id, email_address, kind, subject, body, now, now + self.coalesce_window_seconds)
+            )
+        return {"id": message_id, "status": "Queued"}
+
+    def get(self, message_id: str) -> dict:
+        """
+        Return the delivery status of a message, or {} if it does not exist
+        """
+        with self.lock:
+            message = self.connection.execute(
+                "SELECT id, recipient, kind, subject, status, attempts, error_message, gmail_message_id, digest_id, created_at, sent_at "
+                "FROM messages WHERE id = ?",
+                (message_id,)
+            ).fetchone()
+        return dict(message) if message else {}
+
+    def flush(self, force: bool = False) -> dict:
+        """
+        Send the digests of the recipients whose coalescing window is over (of every recipient if force).
+        Return {"digests": int, "sent": int, "retried": int, "failed": int}, counted in messages except digests.
+        """
+        result = {"digests": 0, "sent": 0, "retried": 0, "failed": 0}
+        with self.flush_lock:
+            # 1. Claim the due messages, grouped by recipient
+            groups = self._claim_due_messages(force)
+            if not groups:
+                return result
+
+            # 2. Send one digest per recipient in Gmail batch requests, a failed batch only fails its own digests
+            digests = [_build_digest(messages) for messages in groups]
+            try:
+                sent_messages = self.google_service.send_emails([
+                    (messages[0]["recipient"], subject, body) for messages, (subject, body) in zip(groups, digests)
+                ])
+            except Exception as e:
+                logging.error(f"Error sending the mail outbox batch: {e}")
+                sent_messages = [({}, e)] * len(groups)
+
+            # 3. Record the delivery status of every message
+            now = time.time()
+            with self.lock:
+                for messages, (sent_message, error) in zip(groups, sent_messages):
+                    digest_id = uuid.uuid4().hex
+                    result["digests"] += 1
+                    for message in messages:
+                        attempts = message["attempts"] + 1
+                        if not error:
+                            result["sent"] += 1
+                            self.connection.execute(
+                                "UPDATE messages SET status = 'Sent', attempts = ?, error_message = '', gmail_message_id = ?, digest_id = ?, sent_at = ? WHERE id = ?",
+                                (attempts, (sent_message or {}).get("id", ""), digest_id, now, message["id"])
+                            )
+                        elif attempts >= MAIL_MAX_ATTEMPTS:
+                            result["failed"] += 1
+                            self.connection.execute(
+                                "UPDATE messages SET status = 'Failed', attempts = ?, error_message = ? WHERE id = ?",
+                                (attempts, str(error), message["id"])
+                            )
+                        else:
+                            result["retried"] += 1
+                            self.connection.execute(
+                                "UPDATE messages SET status = 'Queued', attempts = ?, error_message = ?, send_after = ? WHERE id = ?",
+                                (attempts, str(error), now + MAIL_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), message["id"])
+                            )
+        if result["retried"] or result["failed"]:
+            logging.warning(f"Mail outbox: {result['retried']} messages queued again, {result['failed']} failed")
+        return result
+
+    def start(self) -> None:
+        """
+        Queue again the messages left Sending by a stopped process and start the background flushes.
+        The remaining messages are flushed when the process exits.
+        """
+        with self.lock:
+            self.connection.execute("UPDATE messages SET status = 'Queued' WHERE status = 'Sending'")
+            self.connection.execute(
+                "DELETE FROM messages WHERE status IN ('Sent', 'Failed', 'Superseded') AND created_at < ?",
+                (time.time() - MAIL_RETENTION_SECONDS,)
+            )
+        self.thread = threading.Thread(target=self._work, name="mail_outbox", daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """
+        Stop the background flushes and send everything still queued
+        """
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        try:
+            self.flush(force=True)
+        except Exception as e:
+            logging.error(f"Error flushing the mail outbox: {e}")
+
+    def _work(self) -> None:
+        """
+        Flush the due messages until the outbox is stopped
+        """
+        while not self.stop_event.wait(MAIL_FLUSH_INTERVAL_SECONDS):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error flushing the mail outbox: {e}")
+
+    def _claim_due_messages(self, force: bool) -> list:
+        """
+        Mark as Sending every queued message of the recipients whose oldest message is due,
+        return one list of messages per recipient
+        """
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                messages = self.connection.execute(
+                    "SELECT * FROM messages WHERE status = 'Queued' AND recipient IN "
+                    "(SELECT recipient FROM messages WHERE status = 'Queued' GROUP BY recipient HAVING MIN(send_after) <= ?) "
+                    "ORDER BY created_at",
+                    (float("inf") if force else time.time(),)
+                ).fetchall()
+                self.connection.executemany("UPDATE messages SET status = 'Sending' WHERE id = ?", [(message["id"],) for message in messages])
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        groups = {}
+        for message in messages:
+            groups.setdefault(message["recipient"], []).append(dict(message))
+        return list(groups.values())
+
+def get_mail_outbox(google_service: GoogleService = None) -> MailOutbox:
+    """
+    Return the process-wide outbox, started on first use with the given Google service
+    """
+    global _MAIL_OUTBOX
+    with _MAIL_OUTBOX_LOCK:
+        if _MAIL_OUTBOX is None:
+            _MAIL_OUTBOX = MailOutbox(google_service)
+            _MAIL_OUTBOX.start()
+        return _MAIL_OUTBOX
+
+def _build_digest(messages: list) -> tuple:
+    """
+    Return the (subject, body) of the digest of a recipient's messages, a single message is sent as is
+    """
+    if len(messages) == 1:
+        return messages[0]["subject"], messages[0]["body"]
+
+    time_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    subject = f"[AutomationWorkflow] Digest of {len(messages)} updates - {time_now}"
+    body = f"""
+<h1 style='color:#2d7cff;'>📬 {len(messages)} updates</h1>
+<ul>
+"""
+    for message in messages:
+        body += f"  <li>{message['subject']}</li>\n"
+    body += "</ul>\n<hr>\n"
+    body += "\n".join(message["body"] for message in messages)
+    return subject, body
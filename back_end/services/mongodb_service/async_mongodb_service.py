@@ -0,0 +1,168 @@
+import datetime
+import logging
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from back_end.services.mongodb_service.mongodb_service import (
+    MONGODB_URI, GENERATION_CACHE_MAX_AGE_SECONDS, CONTENT_HASH_INDEX_OPTIONS,
+    _upsert_operation, _upsert_errors, _record_upsert_results, _uploaded_file_operations,
+    _daily_counter_operations, _generation_cache_operations,
+)
+from back_end.services.mongodb_service.mongodb_client import mongodb_client_options
+
+class AsyncMongoDBService:
+    def __init__(self):
+        # Motor clients are bound to the event loop that uses them, only the connection settings are shared
+        self.client = AsyncIOMotorClient(MONGODB_URI, **mongodb_client_options())
+        self.db = self.client["automation_workflow"]
+        self.collection = self.db["file_metadata"]
+        self.daily_counters = self.db["daily_counters"]
+        self.generation_cache = self.db["generation_cache"]
+        self._indexes_created = False
+
+    async def ensure_indexes(self) -> None:
+        """
+        Create the indexes used by the workflow, once per service instance
+        """
+        if self._indexes_created:
+            return
+        await self.collection.create_index([("created_date", ASCENDING), ("generation_status", ASCENDING)])
+        try:
+            await self.collection.create_index("content_hash", **CONTENT_HASH_INDEX_OPTIONS)
+        except OperationFailure as e:
+            logging.error(f"Could not create the unique content_hash index, remove the duplicate documents first: {e}")
+        await self.daily_counters.create_index([("date", ASCENDING), ("status", ASCENDING)], unique=True)
+        await self.generation_cache.create_index("last_used", expireAfterSeconds=GENERATION_CACHE_MAX_AGE_SECONDS)
+        self._indexes_created = True
+
+    async def insert_document(self, document: dict) -> str:
+        result = await self.collection.insert_one(document)
+        return str(result.inserted_id)
+
+    async def insert_documents(self, documents: list, chunk_size: int = 500) -> list:
+        """
+        Insert documents in unordered bulk chunks.
+        Return one (inserted_id, error_message) tuple per document, in the input order.
+        """
+        results = []
+        for start in range(0, len(documents), chunk_size):
+            chunk = documents[start:start + chunk_size]
+            errors = {}
+            try:
+                await self.collection.insert_many(chunk, ordered=False)
+            except BulkWriteError as e:
+                errors = {err["index"]: err.get("errmsg", "Unknown write error") for err in e.details.get("writeErrors", [])}
+            for idx, document in enumerate(chunk):
+                if idx in errors or "_id" not in document:
+                    results.append(("", errors.get(idx, "Document was not inserted")))
+                else:
+                    results.append((str(document["_id"]), ""))
+        return results
+
+    async def upsert_documents(self, documents: list, key: str = "content_hash", chunk_size: int = 500) -> list:
+        """
+        Async variant of MongoDBService.upsert_documents: documents with the same key are updated instead
+        of stored twice. Return one (document_id, error_message, previous_document) tuple per document.
+        """
+        results = [None] * len(documents)
+
+        unkeyed = [idx for idx, document in enumerate(documents) if not document.get(key)]
+        for idx, (document_id, error_message) in zip(unkeyed, await self.insert_documents([documents[idx] for idx in unkeyed], chunk_size)):
+            results[idx] = (document_id, error_message, None)
+
+        keyed = [idx for idx, document in enumerate(documents) if document.get(key)]
+        for start in range(0, len(keyed), chunk_size):
+            chunk = keyed[start:start + chunk_size]
+            keys = list({documents[idx][key] for idx in chunk})
+
+            # 1. Read the state of the documents stored by previous runs
+            previous = {
+                document[key]: document
+                async for document in self.collection.find({key: {"$in": keys}}, {key: 1, "generation_status": 1, "created_date": 1})
+            }
+
+            # 2. Upsert the chunk
+            errors = {}
+            try:
+                await self.collection.bulk_write([_upsert_operation(documents[idx], key) for idx in chunk], ordered=False)
+            except BulkWriteError as e:
+                errors = _upsert_errors(e)
+
+            # 3. Read the ids of the created documents
+            document_ids = {document_key: document["_id"] for document_key, document in previous.items()}
+            created_keys = [document_key for document_key in keys if document_key not in document_ids]
+            if created_keys:
+                async for document in self.collection.find({key: {"$in": created_keys}}, {key: 1}):
+                    document_ids[document[key]] = document["_id"]
+
+            _record_upsert_results(results, documents, chunk, key, previous, document_ids, errors)
+        return results
+
+    async def save_uploaded_files(self, uploaded_files: list) -> None:
+        """
+        Record the Google Drive file of stored documents, from (document_id, uploaded_file) tuples
+        """
+        if uploaded_files:
+            await self.collection.bulk_write(_uploaded_file_operations(uploaded_files), ordered=False)
+
+    async def find_document(self, query: dict) -> dict:
+        return await self.collection.find_one(query)
+
+    async def find_documents_with_filter(self, filter: dict) -> list:
+        return await self.collection.find(filter).to_list(length=None)
+
+    async def increment_daily_counters(self, documents: list, delta: int = 1) -> None:
+        """
+        Add stored documents to the pre-aggregated daily counters with $inc upserts keyed by date and status,
+        a negative delta removes them
+        """
+        operations = _daily_counter_operations(documents, delta)
+        if operations:
+            await self.daily_counters.bulk_write(operations, ordered=False)
+
+    async def find_daily_counters(self, start_date: datetime.date, end_date: datetime.date = None) -> dict:
+        """
+        Read the pre-aggregated daily counters within [start_date, end_date].
+        Return {date: {"Success": int, "Failed": int}}.
+        """
+        end_date = end_date or datetime.date.today()
+        counts = {}
+        async for counter in self.daily_counters.find({"date": {"$gte": start_date.isoformat(), "$lte": end_date.isoformat()}}):
+            date = datetime.date.fromisoformat(counter["date"])
+            counts.setdefault(date, {"Success": 0, "Failed": 0})[counter["status"]] = counter["count"]
+        return counts
+
+    async def find_generation_cache(self, content_hashes: list) -> dict:
+        """
+        Find the generation cache entries of the given content hashes, return {content_hash: entry}
+        """
+        if not content_hashes:
+            return {}
+        return {entry["_id"]: entry async for entry in self.generation_cache.find({"_id": {"$in": content_hashes}})}
+
+    async def save_generation_cache(self, entries: list) -> None:
+        """
+        Upsert generation cache entries and refresh their last_used date
+        """
+        if entries:
+            await self.generation_cache.bulk_write(_generation_cache_operations(entries), ordered=False)
+
+    async def evict_generation_cache(self, max_entries: int) -> int:
+        """
+        Delete the least recently used generation cache entries above max_entries, return the number deleted
+        """
+        excess = await self.generation_cache.estimated_document_count() - max_entries
+        if excess <= 0:
+            return 0
+        oldest = await self.generation_cache.find({}, {"_id": 1}).sort("last_used", ASCENDING).limit(excess).to_list(length=None)
+        result = await self.generation_cache.delete_many({"_id": {"$in": [entry["_id"] for entry in oldest]}})
+        return result.deleted_count
+
+    async def update_document(self, query: dict, update: dict) -> int:
+        result = await self.collection.update_one(query, {"$set": update})
+        return result.modified_count
+
+    async def delete_document(self, query: dict) -> int:
+        result = await self.collection.delete_one(query)
+        return result.deleted_count
@@ -0,0 +1,28 @@
+import argparse
+
+from back_end.services.mongodb_service.mongodb_service import MongoDBService
+
+def main() -> None:
+    """
+    Rebuild or check the pre-aggregated daily counters. The counters are updated after the documents are
+    stored, so they can drift when a run fails in between: check reports the drift, rebuild fixes it.
+    Usage: python -m back_end.services.mongodb_service.daily_counters {rebuild,check}
+    """
+    parser = argparse.ArgumentParser(description="Maintain the daily report counters collection")
+    parser.add_argument("command", choices=["rebuild", "check"], help="Rebuild counters from history or check them against the raw collection")
+    args = parser.parse_args()
+
+    mongodb_service = MongoDBService()
+    if args.command == "rebuild":
+        written = mongodb_service.rebuild_daily_counters()
+        print(f"Rebuilt daily counters: {written} counter documents written")
+    else:
+        mismatches = mongodb_service.check_daily_counters()
+        if not mismatches:
+            print("Daily counters are consistent with file_metadata")
+        for date, counts in sorted(mismatches.items()):
+            print(f"{date}: expected {counts['expected']}, found {counts['actual']}")
+        raise SystemExit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import time
+import logging
+import threading
+
+# Connection settings shared by every client of the process, each can be overridden by an environment variable
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "2")) # Connections kept open so requests skip the TLS handshake
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "10000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "60000"))
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "zstd,zlib") # The first one supported by the server is used
+MONGODB_WRITE_CONCERN = os.getenv("MONGODB_WRITE_CONCERN", "majority")
+MONGODB_WRITE_CONCERN_TIMEOUT_MS = int(os.getenv("MONGODB_WRITE_CONCERN_TIMEOUT_MS", "10000"))
+
+_CLIENTS = {} # uri -> MongoClient
+_CLIENTS_LOCK = threading.Lock()
+
+def mongodb_client_options() -> dict:
+    """
+    Keyword arguments of MongoClient (and Motor's AsyncIOMotorClient) built from the connection settings
+    """
+    write_concern = int(MONGODB_WRITE_CONCERN) if MONGODB_WRITE_CONCERN.isdigit() else MONGODB_WRITE_CONCERN
+    return {
+        "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGODB_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGODB_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGODB_SOCKET_TIMEOUT_MS,
+        "compressors": MONGODB_COMPRESSORS,
+        "w": write_concern,
+        "wTimeoutMS": MONGODB_WRITE_CONCERN_TIMEOUT_MS,
+        "retryWrites": True,
+    }
+
+def get_mongodb_client(uri: str):
+    """
+    Return the process-wide MongoClient of a URI, created on first use.
+    MongoClient is thread-safe: every service shares its connection pool.
+    """
+    from pymongo import MongoClient
+
+    with _CLIENTS_LOCK:
+        if uri not in _CLIENTS:
+            _CLIENTS[uri] = MongoClient(uri, **mongodb_client_options())
+        return _CLIENTS[uri]
+
+def check_mongodb_health(uri: str) -> dict:
+    """
+    Ping the cluster, return {"ok": bool, "latency_ms": float, "error": str}.
+    The first ping also opens the connection pool, so later requests skip the cold-connection cost.
+    """
+    from pymongo.errors import PyMongoError
+
+    started_at = time.perf_counter()
+    try:
+        get_mongodb_client(uri).admin.command("ping")
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started_at) * 1000, 1), "error": ""}
+    except PyMongoError as e:
+        logging.error(f"MongoDB health check failed: {e}")
+        return {"ok": False, "latency_ms": round((time.perf_counter() - started_at) * 1000, 1), "error": str(e)}
+
+def warm_up_mongodb_client(uri: str) -> threading.Thread:
+    """
+    Run the health check in the background, so startup does not wait for the SRV lookup and TLS handshake
+    """
+    thread = threading.Thread(target=check_mongodb_health, args=(uri,), name="mongodb_warm_up", daemon=True)
+    thread.start()
+    return thread
+
+def close_mongodb_clients() -> None:
+    """
+    Close every client of the process
+    """
+    with _CLIENTS_LOCK:
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
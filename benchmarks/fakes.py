@@ -0,0 +1,316 @@
+import time
+import random
+import hashlib
+import threading
+from functools import cached_property
+
+import httplib2
+import mongomock
+from mongomock.filtering import filter_applies
+from googleapiclient.errors import HttpError
+
+from back_end.services.google_service.google_service import GoogleService, SHEETS_CHUNK_ROWS, SHEETS_RANGES_PER_REQUEST, GMAIL_BATCH_SIZE, DRIVE_LIST_PAGE_SIZE
+from back_end.services.mongodb_service.mongodb_service import MongoDBService
+from back_end.services.ai_service.ai_service import StubProvider
+from back_end.services.ai_service.generation_memo import GenerationMemo
+from back_end.services.ai_service.generation_scheduler import GenerationScheduler
+
+# Simulated latency in seconds of one request to each API
+FAKE_LATENCIES = {
+    "sheets": 0.2,
+    "drive": 0.02,
+    "gmail": 0.1,
+    "mongodb": 0.01,
+    "ai": 0.1,
+}
+MONGODB_TTL_MONITOR_SECONDS = 60 # Interval of the TTL monitor of MongoDB
+# Limits of the stub AI providers: OpenAI answers one prompt per request, Claude batches them.
+# The limits of a provider are process-wide, they apply if the benchmark is the first to use the provider.
+STUB_PROVIDER_SETTINGS = {
+    "openai": {"model": "stub-openai", "rate": 200, "burst": 200, "max_concurrency": 8},
+    "claude": {"model": "stub-claude", "rate": 50, "burst": 50, "max_concurrency": 4},
+}
+HEADER = ["File Name", "Description", "Assets", "Output Format", "Model Specification"]
+OUTPUT_FORMATS = ["PNG", "JPG", "GIF", "MP3"]
+MODEL_SPECIFICATIONS = ["OpenAI", "Claude"]
+
+def synthetic_rows(row_count: int, seed: int = 0) -> list:
+    """
+    Build a sheet (header included) of valid rows with unique file names
+    """
+    rng = random.Random(seed)
+    rows = [HEADER]
+    for idx in range(row_count):
+        rows.append([
+            f"file_{idx}",
+            f"Description of item {idx} " + "lorem ipsum " * rng.randint(1, 10),
+            f"https://example.com/assets/{idx}.png",
+            rng.choice(OUTPUT_FORMATS),
+            rng.choice(MODEL_SPECIFICATIONS),
+        ])
+    return rows
+
+def stub_generation_scheduler(latency: float = FAKE_LATENCIES["ai"]) -> GenerationScheduler:
+    """
+    GenerationScheduler of StubProviders with an empty in-memory memo, so every run generates its rows
+    """
+    return GenerationScheduler(
+        providers={
+            "openai": StubProvider("openai", latency),
+            "claude": StubProvider("claude", latency, supports_batch=True),
+        },
+        settings=STUB_PROVIDER_SETTINGS,
+        memo=GenerationMemo(sqlite_path=None),
+    )
+
+class FakeGoogleService(GoogleService):
+    """
+    GoogleService serving a synthetic sheet and accepting uploads and emails locally.
+    Every request sleeps for the latency of its API and fails with an HttpError
+    of status error_status with probability error_rate.
+    """
+    def __init__(self, rows: list, latencies: dict = FAKE_LATENCIES, error_rate: float = 0.0, error_status: int = 503, seed: int = 0):
+        self.rows = rows
+        self.latencies = latencies
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = {"sheets": 0, "drive": 0, "gmail": 0}
+        self.uploaded_files = {}
+        self.sent_emails = []
+
+    def get_sheet_metadata(self, google_sheets_url) -> dict:
+        self._request("sheets")
+        return {
+            "spreadsheet_id": "fake",
+            "file_name": "Synthetic sheet",
+            "sheet_name": "Sheet1",
+            "row_count": len(self.rows),
+            "column_count": len(HEADER),
+        }
+
+    def iter_data_from_sheets(self, google_sheets_url, chunk_rows=SHEETS_CHUNK_ROWS, metadata=None):
+        # One request per SHEETS_RANGES_PER_REQUEST chunks, like the batchGet paging of GoogleService
+        page_rows = chunk_rows * SHEETS_RANGES_PER_REQUEST
+        for start in range(0, len(self.rows), page_rows):
+            self._request("sheets")
+            yield from self.rows[start:start + page_rows]
+
+    def list_drive_folder(self, google_drive_folder_path) -> list:
+        # One request per DRIVE_LIST_PAGE_SIZE files, like the paging of GoogleService
+        with self.lock:
+            files = [{"id": file_id, "name": name, "md5Checksum": md5_checksum} for file_id, (name, md5_checksum, _) in reversed(self.uploaded_files.items())]
+        for _ in range(max(1, -(-len(files) // DRIVE_LIST_PAGE_SIZE))):
+            self._request("drive")
+        return files
+
+    def store_data_to_drive(self, file_path, google_drive_folder_path, file_id=None):
+        self._request("drive")
+        with open(file_path, 'rb') as f:
+            return self._store_file(file_path.replace("\\", "/").split("/")[-1], f.read(), file_id)
+
+    def store_bytes_to_drive(self, file_name, data, google_drive_folder_path, mimetype='application/json', file_id=None):
+        self._request("drive")
+        return self._store_file(file_name, data, file_id)
+
+    def send_email(self, email_address, subject, body):
+        self._request("gmail")
+        with self.lock:
+            self.sent_emails.append({"to": email_address, "subject": subject, "body": body})
+            return {"id": f"message_{len(self.sent_emails)}"}
+
+    def send_emails(self, messages):
+        # One request per batch, a failed batch fails all its messages
+        results = []
+        for start in range(0, len(messages), GMAIL_BATCH_SIZE):
+            try:
+                self._request("gmail")
+            except HttpError as e:
+                results.extend(({}, e) for _ in messages[start:start + GMAIL_BATCH_SIZE])
+                continue
+            with self.lock:
+                for email_address, subject, body in messages[start:start + GMAIL_BATCH_SIZE]:
+                    self.sent_emails.append({"to": email_address, "subject": subject, "body": body})
+                    results.append(({"id": f"message_{len(self.sent_emails)}"}, None))
+        return results
+
+    def _store_file(self, file_name, data, file_id=None) -> dict:
+        # Updating a file keeps its id, creating one adds a file even if the name exists
+        with self.lock:
+            file_id = file_id or f"file_{len(self.uploaded_files)}"
+            self.uploaded_files[file_id] = (file_name, hashlib.md5(data).hexdigest(), len(data))
+        return {"id": file_id, "name": file_name}
+
+    def _request(self, api_name) -> None:
+        """
+        Simulate one request: count it, wait for its latency and inject errors
+        """
+        with self.lock:
+            self.requests[api_name] += 1
+            failed = self.random.random() < self.error_rate
+        time.sleep(self.latencies.get(api_name, 0))
+        if failed:
+            raise HttpError(httplib2.Response({"status": self.error_status}), b"Injected error")
+
+class FakeMongoDBService(MongoDBService):
+    """
+    The real MongoDBService on a mongomock client, with a fixed latency per round trip.
+    Every write, upsert, counter and generation cache query runs the MongoDBService code;
+    the fake only adds the latency of the round trips each method makes.
+    """
+    def __init__(self, latency: float = FAKE_LATENCIES["mongodb"]):
+        super().__init__(mongomock.MongoClient())
+        self.latency = latency
+
+    @cached_property
+    def db(self):
+        db = self.client["automation_workflow"]
+        for collection_name in ("file_metadata", "daily_counters", "generation_cache"):
+            _narrow_filters(db[collection_name])
+        self._ensure_indexes(db)
+        return db
+
+    def insert_document(self, document: dict) -> str:
+        self._round_trips(1)
+        return super().insert_document(document)
+
+    def insert_documents(self, documents: list, chunk_size: int = 500) -> list:
+        # One insert_many per chunk
+        self._round_trips(_chunk_count(documents, chunk_size))
+        return super().insert_documents(documents, chunk_size)
+
+    def upsert_documents(self, documents: list, key: str = "content_hash", chunk_size: int = 500) -> list:
+        # A read, a bulk write and a read of the created ids per chunk of keyed documents
+        keyed = [document for document in documents if document.get(key)]
+        self._round_trips(3 * _chunk_count(keyed, chunk_size))
+        return super().upsert_documents(documents, key, chunk_size)
+
+    def save_uploaded_files(self, uploaded_files: list) -> None:
+        self._round_trips(1 if uploaded_files else 0)
+        return super().save_uploaded_files(uploaded_files)
+
+    def increment_daily_counters(self, documents: list, delta: int = 1) -> None:
+        self._round_trips(1 if documents else 0)
+        return super().increment_daily_counters(documents, delta)
+
+    def find_daily_counters(self, start_date, end_date=None) -> dict:
+        self._round_trips(1)
+        return super().find_daily_counters(start_date, end_date)
+
+    def find_generation_cache(self, content_hashes: list) -> dict:
+        self._round_trips(1 if content_hashes else 0)
+        return super().find_generation_cache(content_hashes)
+
+    def save_generation_cache(self, entries: list) -> None:
+        self._round_trips(1 if entries else 0)
+        return super().save_generation_cache(entries)
+
+    def evict_generation_cache(self, max_entries: int) -> int:
+        # A count, then a read and a delete of the oldest entries
+        self._round_trips(1)
+        return super().evict_generation_cache(max_entries)
+
+    def _round_trips(self, count: int) -> None:
+        time.sleep(self.latency * count)
+
+def _chunk_count(documents: list, chunk_size: int) -> int:
+    return (len(documents) + chunk_size - 1) // chunk_size
+
+def _narrow_filters(collection, indexed_fields: tuple = ("content_hash",)) -> None:
+    """
+    Make a mongomock collection select the candidates of an equality or $in filter on _id or on an
+    indexed field with a lookup before evaluating the filter, as a server would with its indexes.
+    mongomock otherwise evaluates every filter, the unique index checks included, on every document,
+    and the benchmark would measure mongomock instead of the workflow.
+    """
+    iter_documents = collection._iter_documents
+    store = collection._store
+    store.__class__ = _IndexedCollectionStore
+    store.index_fields(indexed_fields)
+
+    def narrowed_iter_documents(filter):
+        field, values = _equality_condition(filter or {}, ("_id",) + indexed_fields)
+        if field is None:
+            return iter_documents(filter)
+        candidates = store.lookup(field, values)
+        if len(filter) == 1 and field in filter:
+            # The lookup already applied the whole filter
+            return iter(candidates)
+        return (document for document in candidates if filter_applies(filter, document))
+    collection._iter_documents = narrowed_iter_documents
+
+class _IndexedCollectionStore(mongomock.store.CollectionStore):
+    """
+    mongomock document store keeping a value -> _ids index of some fields, updated when a document is
+    written or deleted, and expiring TTL documents periodically. mongomock updates documents in place: an update changing an indexed field
+    would not be seen, which is fine for content_hash, the idempotency key of the stored rows.
+    """
+    def index_fields(self, fields: tuple) -> None:
+        self.expired_at = 0.0
+        with self._rwlock.writer():
+            self.field_index = {field: {} for field in fields}
+            for document in self._documents.values():
+                self._index(document)
+
+    def lookup(self, field: str, values: set) -> list:
+        """
+        Return the documents whose field has one of the values
+        """
+        with self._rwlock.reader():
+            if field == "_id":
+                document_ids = values
+            else:
+                document_ids = {document_id for value in values for document_id in self.field_index[field].get(value, ())}
+            return [self._documents[document_id] for document_id in document_ids if document_id in self._documents]
+
+    def __setitem__(self, key, val):
+        with self._rwlock.writer():
+            if key in self._documents:
+                self._unindex(self._documents[key])
+            self._documents[key] = val
+            self._index(val)
+
+    def __delitem__(self, key):
+        with self._rwlock.writer():
+            self._unindex(self._documents[key])
+            del self._documents[key]
+
+    def _remove_expired_documents(self):
+        # Like the TTL monitor of the server, at most once per MONGODB_TTL_MONITOR_SECONDS instead of on every access
+        if time.monotonic() - self.expired_at >= MONGODB_TTL_MONITOR_SECONDS:
+            self.expired_at = time.monotonic()
+            super()._remove_expired_documents()
+
+    def _index(self, document: dict) -> None:
+        for field, index in self.field_index.items():
+            if _is_hashable(document.get(field)):
+                index.setdefault(document.get(field), set()).add(document["_id"])
+
+    def _unindex(self, document: dict) -> None:
+        for field, index in self.field_index.items():
+            if _is_hashable(document.get(field)):
+                index.get(document.get(field), set()).discard(document["_id"])
+
+def _equality_condition(filter: dict, fields: tuple) -> tuple:
+    """
+    Return (field, set of values) of the first top-level equality or $in condition of a filter on one of fields,
+    (None, None) if there is none
+    """
+    for clause in [filter] + [clause for clause in filter.get("$and", []) if isinstance(clause, dict)]:
+        for field, condition in clause.items():
+            if field not in fields:
+                continue
+            if isinstance(condition, dict):
+                if list(condition) != ["$in"]:
+                    continue
+                condition = condition["$in"]
+            else:
+                condition = [condition]
+            if all(_is_hashable(value) for value in condition):
+                return field, set(condition)
+    return None, None
+
+def _is_hashable(value) -> bool:
+    # Array and document values match on their content, they are left to mongomock
+    return not isinstance(value, (list, dict))
@@ -0,0 +1,85 @@
+import time
+import pickle
+import argparse
+import importlib
+import threading
+import statistics
+
+from back_end.services.google_service import google_service
+from back_end.services.google_service.google_service import GoogleService
+
+GOOGLE_CLIENTS_CALLS = 50
+GOOGLE_CLIENTS_APIS = [("sheets", "v4"), ("drive", "v3"), ("gmail", "v1")] # (api_name, api_version)
+
+class LocalCredentialsGoogleService(GoogleService):
+    """
+    GoogleService whose credentials are unpickled from memory instead of the config files,
+    with an optional delay standing for the token refresh of a real load
+    """
+    def __init__(self, load_latency: float = 0.0):
+        from google.oauth2.credentials import Credentials
+
+        self.load_latency = load_latency
+        self.token = pickle.dumps(Credentials(token="benchmark"))
+
+    def _load_credentials(self, api_name):
+        time.sleep(self.load_latency)
+        return pickle.loads(self.token)
+
+def clear_caches() -> None:
+    """
+    Drop the process-wide credentials and the built clients of the current thread
+    """
+    with google_service._CREDENTIALS_LOCK:
+        google_service._CREDENTIALS_CACHE.clear()
+    google_service._SERVICE_CACHE.services = {}
+
+def time_call(service: GoogleService, api_name: str, api_version: str) -> float:
+    """
+    Return the seconds spent getting the client of an API, the part of a call the caches save (no network)
+    """
+    started_at = time.perf_counter()
+    service._get_service(api_name, api_version)
+    return time.perf_counter() - started_at
+
+def time_call_in_new_thread(service: GoogleService, api_name: str, api_version: str) -> float:
+    seconds = []
+    thread = threading.Thread(target=lambda: seconds.append(time_call(service, api_name, api_version)))
+    thread.start()
+    thread.join()
+    return seconds[0]
+
+def main() -> None:
+    """
+    Measure the startup and per-call latency of the Google clients with the process-wide credentials
+    cache and the per-thread client cache, and with both caches dropped before every call.
+    Usage: python -m benchmarks.google_clients [--calls 50] [--credentials-latency 0.0]
+    """
+    parser = argparse.ArgumentParser(description="Compare cached and uncached Google clients and credentials")
+    parser.add_argument("--calls", type=int, default=GOOGLE_CLIENTS_CALLS, help="Calls measured per API and cache setting")
+    parser.add_argument("--credentials-latency", type=float, default=0.0, help="Seconds added to every credentials load (token refresh)")
+    args = parser.parse_args()
+
+    # Warm-up: load the client library before the first timed call, its import time is measured by import_budget
+    importlib.import_module("googleapiclient.discovery")
+    service = LocalCredentialsGoogleService(args.credentials_latency)
+    for api_name, api_version in GOOGLE_CLIENTS_APIS:
+        # 1. Startup: first call of the process, then first call of a new worker thread (credentials already cached)
+        clear_caches()
+        first_call = time_call(service, api_name, api_version)
+        new_thread = time_call_in_new_thread(service, api_name, api_version)
+
+        # 2. Per-call latency with warm caches, then with the caches dropped before every call
+        cached = statistics.median(time_call(service, api_name, api_version) for _ in range(args.calls))
+        uncached = []
+        for _ in range(args.calls):
+            clear_caches()
+            uncached.append(time_call(service, api_name, api_version))
+        uncached = statistics.median(uncached)
+        print(
+            f"{api_name} {api_version}: first call {first_call * 1000:.1f} ms, first call of a thread {new_thread * 1000:.1f} ms, "
+            f"cached call {cached * 1000:.3f} ms, uncached call {uncached * 1000:.1f} ms (x{uncached / cached:.0f})"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import re
+import sys
+import argparse
+import subprocess
+
+# Cumulative import time allowed for the entry points of the package, in milliseconds (about twice the measured time)
+IMPORT_BUDGETS_MS = {
+    "back_end.automation_workflow.automation_workflow": 350,
+    "back_end.automation_workflow.job_queue": 400,
+    "back_end.automation_workflow.batch_runner": 400,
+}
+# Heavy dependencies that must only be imported when a step needs them
+LAZY_MODULES = ["matplotlib", "pandas", "numpy", "googleapiclient", "google_auth_oauthlib", "google.oauth2", "pymongo", "bson", "motor"]
+IMPORT_TIME_RUNS = 5 # The fastest run is kept, the others include noise from the machine
+
+_IMPORT_TIME_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$")
+
+def measure_import_ms(module_name: str, runs: int = IMPORT_TIME_RUNS) -> float:
+    """
+    Import a module in fresh interpreters with -X importtime, return its fastest cumulative import time in milliseconds
+    """
+    timings = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+            capture_output=True, text=True, check=True
+        )
+        for line in completed.stderr.splitlines():
+            match = _IMPORT_TIME_LINE.match(line)
+            if match and match.group(2) == module_name:
+                timings.append(int(match.group(1)) / 1000)
+    return min(timings)
+
+def check_cold_start(module_name: str) -> list:
+    """
+    Import a module and create an AutomationWorkflow in a fresh interpreter, return one message per problem:
+    a lazy module loaded, or the workflow failing to be created (it must not connect to anything).
+    """
+    code = (
+        f"import sys, {module_name}\n"
+        "from back_end.automation_workflow.automation_workflow import AutomationWorkflow\n"
+        "AutomationWorkflow().reset_resources()\n"
+        f"print(' '.join(name for name in {LAZY_MODULES!r} if name in sys.modules))\n"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if completed.returncode != 0:
+        return [f"AutomationWorkflow() failed: {completed.stderr.strip().splitlines()[-1]}"]
+    return [f"{name} imported before first use" for name in completed.stdout.split()]
+
+def main() -> None:
+    """
+    Check the cold start cost of the package: import times within budget and no heavy dependency loaded eagerly.
+    Usage: python -m benchmarks.import_budget [--scale 1.5]
+    """
+    parser = argparse.ArgumentParser(description="Check the import time budget of the workflow package")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the budgets, for slower machines")
+    parser.add_argument("--runs", type=int, default=IMPORT_TIME_RUNS, help="Interpreters started per module")
+    args = parser.parse_args()
+
+    failures = []
+    for module_name, budget_ms in IMPORT_BUDGETS_MS.items():
+        budget_ms *= args.scale
+        import_ms = measure_import_ms(module_name, args.runs)
+        print(f"{module_name}: {import_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+        if import_ms > budget_ms:
+            failures.append(f"{module_name}: import time {import_ms:.1f} ms over the budget of {budget_ms:.0f} ms")
+        failures.extend(f"{module_name}: {problem}" for problem in check_cold_start(module_name))
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import gc
+import argparse
+import tracemalloc
+
+from back_end.automation_workflow.steps.shared.row_record import row_record_factory
+from benchmarks.fakes import synthetic_rows
+
+MEMORY_BENCHMARK_ROWS = 100000
+
+# Fields set on a row that went through every step, shared values so only the containers are measured
+PROCESSED_FIELDS = {
+    "validation": True,
+    "invalid_message": "",
+    "content_hash": "0" * 64,
+    "output_file_name": "file.json",
+    "file_path": "",
+    "generation_status": "Success",
+    "mongodb_id": "0" * 24,
+    "google_drive_uploaded_file": {},
+    "checkpointed": True,
+}
+
+def measure_rows(build_rows, cells: list, processed: bool) -> float:
+    """
+    Build the rows of a sheet, return the bytes allocated per row (the cell values are not counted)
+    """
+    gc.collect()
+    tracemalloc.start()
+    rows = build_rows(cells)
+    if processed:
+        for row in rows:
+            for key, value in PROCESSED_FIELDS.items():
+                row[key] = value
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return allocated / len(rows)
+
+def main() -> None:
+    """
+    Compare the per-row memory of the dict rows and of RowRecord, after loading and after every step.
+    Usage: python -m benchmarks.row_memory [--rows 100000]
+    """
+    parser = argparse.ArgumentParser(description="Measure the memory footprint of a row")
+    parser.add_argument("--rows", type=int, default=MEMORY_BENCHMARK_ROWS, help="Synthetic sheet size")
+    args = parser.parse_args()
+
+    sheet = synthetic_rows(args.rows)
+    header, cells = sheet[0], sheet[1:]
+    build_row = row_record_factory(header)
+    representations = {
+        "dict": lambda cells: [dict(zip(header, row)) for row in cells],
+        "RowRecord": lambda cells: [build_row(row) for row in cells],
+    }
+    for stage, processed in (("loaded", False), ("processed", True)):
+        footprints = {name: measure_rows(build_rows, cells, processed) for name, build_rows in representations.items()}
+        change = footprints["RowRecord"] / footprints["dict"] - 1
+        print(f"{stage}: dict {footprints['dict']:.0f} B/row, RowRecord {footprints['RowRecord']:.0f} B/row ({change:+.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import os
+import gc
+import json
+import time
+import logging
+import argparse
+import platform
+import tracemalloc
+
+from back_end.automation_workflow.automation_workflow import AutomationWorkflow
+from benchmarks.fakes import FakeGoogleService, FakeMongoDBService, FAKE_LATENCIES, synthetic_rows, stub_generation_scheduler
+
+BENCHMARK_ROW_COUNTS = [100, 1000, 10000, 100000]
+UPLOAD_WORKER_SWEEP = [1, 4, 8, 16, 32] # upload_max_workers values compared by the upload_workers_* modes
+BENCHMARK_MODES = {
+    "sequential": {},
+    "pipelined": {"pipelined_execution": True},
+    "ai_generation": {"ai_generation": True}, # Generated by stub AI providers
+    "in_memory_output": {"in_memory_output": True}, # Outputs kept in memory instead of temporary files
+    "vectorized_validation": {"vectorized_validation": True}, # Whole-sheet validation over a DataFrame
+    **{f"upload_workers_{workers}": {"upload_max_workers": workers} for workers in UPLOAD_WORKER_SWEEP},
+}
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+REGRESSION_TOLERANCE = 0.2 # Relative slowdown or memory growth allowed before flagging a regression
+REGRESSION_MIN_SECONDS = 0.05 # Smaller absolute slowdowns are noise
+REGRESSION_MIN_MEMORY_MB = 1.0
+
+def run_case(row_count: int, mode: str, latencies: dict, error_rate: float, track_memory: bool = True) -> dict:
+    """
+    Run the main and optional steps once over a synthetic sheet, return the timings and peak memory
+    """
+    google_service = FakeGoogleService(synthetic_rows(row_count), latencies, error_rate)
+    mongodb_service = FakeMongoDBService(latencies.get("mongodb", 0))
+    automation_workflow = AutomationWorkflow(google_service, mongodb_service)
+    automation_workflow.generation_scheduler = stub_generation_scheduler(latencies.get("ai", 0))
+    input_fields = {
+        "google_sheets_url": "https://docs.google.com/spreadsheets/d/fake/edit",
+        "google_drive_folder_url": "https://drive.google.com/drive/folders/fake",
+        "send_email_notifications": True,
+        "email_address": "benchmark@example.com",
+        "generate_daily_report": True,
+        **BENCHMARK_MODES[mode],
+    }
+
+    gc.collect()
+    if track_memory:
+        tracemalloc.start()
+    started_at = time.perf_counter()
+    try:
+        automation_workflow.load_input_data(input_fields, lambda message: logging.debug(message))
+        automation_workflow.process_main_steps()
+        automation_workflow.process_optional_steps()
+        end_to_end_seconds = time.perf_counter() - started_at
+        peak_memory_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if track_memory else 0.0
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+
+    report = automation_workflow.report_metrics()
+    result = {
+        "rows": row_count,
+        "mode": mode,
+        "status": automation_workflow.status,
+        "status_of_optional_steps": automation_workflow.status_of_optional_steps,
+        "end_to_end_seconds": round(end_to_end_seconds, 3),
+        "rows_per_second": round(row_count / end_to_end_seconds, 1),
+        "peak_memory_mb": round(peak_memory_mb, 2),
+        "steps": {step_name: step["wall_seconds"] for step_name, step in report["steps"].items()},
+        "requests": {
+            **google_service.requests,
+            "ai": sum(provider.calls for provider in automation_workflow.generation_scheduler.providers.values()),
+        },
+    }
+    automation_workflow.reset_resources()
+    return result
+
+def find_regressions(results: dict, baseline: dict, tolerance: float = REGRESSION_TOLERANCE) -> list:
+    """
+    Compare results with the baseline, return one message per metric that got worse than the tolerance
+    """
+    regressions = []
+    for case_name, result in results.items():
+        expected = baseline.get(case_name)
+        if not expected:
+            continue
+        if result["status"] != expected["status"]:
+            regressions.append(f"{case_name}: status {result['status']} (baseline {expected['status']})")
+
+        # (metric name, current value, baseline value, minimal absolute difference)
+        metrics = [
+            ("end_to_end_seconds", result["end_to_end_seconds"], expected["end_to_end_seconds"], REGRESSION_MIN_SECONDS),
+            ("peak_memory_mb", result["peak_memory_mb"], expected["peak_memory_mb"], REGRESSION_MIN_MEMORY_MB),
+        ]
+        metrics.extend(
+            (f"steps.{step_name}", seconds, expected["steps"][step_name], REGRESSION_MIN_SECONDS)
+            for step_name, seconds in result["steps"].items() if step_name in expected.get("steps", {})
+        )
+        for metric_name, value, expected_value, min_difference in metrics:
+            if value > expected_value * (1 + tolerance) and value - expected_value > min_difference:
+                regressions.append(f"{case_name}: {metric_name} {value} (baseline {expected_value}, +{(value / expected_value - 1) * 100 if expected_value else float('inf'):.0f}%)")
+    return regressions
+
+def main() -> None:
+    """
+    Benchmark the whole workflow against local fakes of Google and MongoDB.
+    Usage: python -m benchmarks.run_benchmarks [--rows 100 1000] [--modes sequential pipelined] [--update-baseline]
+    The fakes need the packages of benchmarks/requirements.txt.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the automation workflow with local fakes")
+    parser.add_argument("--rows", type=int, nargs="+", default=BENCHMARK_ROW_COUNTS, help="Synthetic sheet sizes")
+    parser.add_argument("--modes", nargs="+", choices=list(BENCHMARK_MODES), default=list(BENCHMARK_MODES), help="Execution modes")
+    parser.add_argument("--sheets-latency", type=float, default=FAKE_LATENCIES["sheets"], help="Seconds per Sheets request")
+    parser.add_argument("--drive-latency", type=float, default=FAKE_LATENCIES["drive"], help="Seconds per Drive request")
+    parser.add_argument("--gmail-latency", type=float, default=FAKE_LATENCIES["gmail"], help="Seconds per Gmail request")
+    parser.add_argument("--mongodb-latency", type=float, default=FAKE_LATENCIES["mongodb"], help="Seconds per MongoDB round trip")
+    parser.add_argument("--ai-latency", type=float, default=FAKE_LATENCIES["ai"], help="Seconds per stub AI provider request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a Google request failing with HTTP 503")
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory tracking (tracemalloc slows the run down)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline results to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help="Relative slowdown allowed before flagging a regression")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    latencies = {
+        "sheets": args.sheets_latency,
+        "drive": args.drive_latency,
+        "gmail": args.gmail_latency,
+        "mongodb": args.mongodb_latency,
+        "ai": args.ai_latency,
+    }
+
+    # 1. Run every case, with the lazily imported dependencies loaded first: the import cost is checked by import_budget.
+    # An untimed run pays the other one-time costs of the process (first chart render, mongomock imports).
+    import matplotlib.pyplot, pandas, googleapiclient.discovery, googleapiclient.errors # noqa: F401
+    run_case(10, "sequential", latencies, args.error_rate, track_memory=False)
+    results = {}
+    for row_count in args.rows:
+        for mode in args.modes:
+            case_name = f"{mode}-{row_count}"
+            results[case_name] = run_case(row_count, mode, latencies, args.error_rate, not args.no_memory)
+            result = results[case_name]
+            print(f"{case_name}: {result['status']} in {result['end_to_end_seconds']}s ({result['rows_per_second']} rows/s), peak {result['peak_memory_mb']} MB")
+
+    output = {"python": platform.python_version(), "platform": platform.platform(), "latencies": latencies, "results": results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=4)
+
+    # 2. Store or compare with the baseline
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(output, results={**baseline.get("results", {}), **results})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=4)
+        print(f"Baseline updated: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create one")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("latencies") != latencies:
+        print("Warning: the baseline was recorded with different latencies")
+    regressions = find_regressions(results, baseline.get("results", {}), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    raise SystemExit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
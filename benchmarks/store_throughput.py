@@ -0,0 +1,70 @@
+import time
+import hashlib
+import argparse
+from datetime import datetime
+
+from back_end.automation_workflow.steps.shared.common import MAPPING_COLUMNS, MONGODB_INSERT_CHUNK_SIZE
+from benchmarks.fakes import FakeMongoDBService, FAKE_LATENCIES, synthetic_rows
+
+STORE_BENCHMARK_ROWS = [1000]
+
+def build_documents(row_count: int) -> list:
+    """
+    Build the documents the store step writes for a synthetic sheet of generated rows
+    """
+    sheet = synthetic_rows(row_count)
+    documents = []
+    for cells in sheet[1:]:
+        row = dict(zip(sheet[0], cells), validation=True, invalid_message="", generation_status="Success")
+        row["content_hash"] = hashlib.sha256(repr(cells).encode('utf-8')).hexdigest()
+        document = {MAPPING_COLUMNS[k]: row[k] for k in MAPPING_COLUMNS if k in row}
+        document["created_date"] = datetime.now()
+        documents.append(document)
+    return documents
+
+def store_per_row(mongodb_service: FakeMongoDBService, documents: list, chunk_size: int) -> list:
+    return [mongodb_service.insert_document(document) for document in documents]
+
+def store_batched(mongodb_service: FakeMongoDBService, documents: list, chunk_size: int) -> list:
+    return mongodb_service.insert_documents(documents, chunk_size)
+
+def store_upserted(mongodb_service: FakeMongoDBService, documents: list, chunk_size: int) -> list:
+    return mongodb_service.upsert_documents(documents, chunk_size=chunk_size)
+
+# Write strategy name -> function(mongodb_service, documents, chunk_size)
+STORE_STRATEGIES = {
+    "insert_document per row": store_per_row,
+    "insert_documents": store_batched,
+    "upsert_documents": store_upserted, # What the store step uses
+}
+
+def main() -> None:
+    """
+    Compare the rows/s of the batched MongoDB writes with one insert_document round trip per row,
+    on the real MongoDBService running on mongomock with a fixed latency per round trip.
+    Usage: python -m benchmarks.store_throughput [--rows 1000 5000] [--mongodb-latency 0.01] [--chunk-size 500]
+    """
+    parser = argparse.ArgumentParser(description="Compare batched and per-row MongoDB writes")
+    parser.add_argument("--rows", type=int, nargs="+", default=STORE_BENCHMARK_ROWS, help="Numbers of documents to store")
+    parser.add_argument("--mongodb-latency", type=float, default=FAKE_LATENCIES["mongodb"], help="Seconds per MongoDB round trip")
+    parser.add_argument("--chunk-size", type=int, default=MONGODB_INSERT_CHUNK_SIZE, help="Documents per bulk write")
+    args = parser.parse_args()
+
+    for row_count in args.rows:
+        documents = build_documents(row_count)
+        throughputs = {}
+        for name, store in STORE_STRATEGIES.items():
+            # A new database per strategy, and copies since the writes add an _id to the documents
+            mongodb_service = FakeMongoDBService(args.mongodb_latency)
+            copies = [dict(document) for document in documents]
+            started_at = time.perf_counter()
+            store(mongodb_service, copies, args.chunk_size)
+            seconds = time.perf_counter() - started_at
+            throughputs[name] = row_count / seconds
+            stored = mongodb_service.collection.count_documents({})
+            print(f"{row_count} rows, {name}: {seconds:.3f}s ({throughputs[name]:.1f} rows/s, {stored} stored)")
+        per_row = throughputs["insert_document per row"]
+        print(f"{row_count} rows: " + ", ".join(f"{name} x{throughput / per_row:.1f}" for name, throughput in throughputs.items() if name != "insert_document per row"))
+
+if __name__ == "__main__":
+    main()
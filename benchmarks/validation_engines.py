@@ -0,0 +1,57 @@
+import time
+import random
+import argparse
+import importlib
+
+from back_end.automation_workflow.steps.validate_input_data import main_validate_input_data
+from benchmarks.fakes import synthetic_rows
+
+VALIDATION_BENCHMARK_ROWS = [10000, 100000]
+VALIDATION_INVALID_RATE = 0.05 # Share of rows broken on purpose, so the error messages are built too
+
+def build_rows(row_count: int, invalid_rate: float, seed: int = 0) -> list:
+    """
+    Build the dict rows of a synthetic sheet, with a share of missing, unknown or duplicate values
+    """
+    rng = random.Random(seed)
+    sheet = synthetic_rows(row_count, seed)
+    rows = [dict(zip(sheet[0], cells)) for cells in sheet[1:]]
+    for idx, row in enumerate(rows):
+        if rng.random() < invalid_rate:
+            breakage = rng.choice(("missing", "unknown", "duplicate"))
+            if breakage == "missing":
+                row["Description"] = ""
+            elif breakage == "unknown":
+                row["Output Format"] = "BMP"
+            elif idx:
+                row["File Name"] = rows[idx - 1]["File Name"]
+    return rows
+
+def main() -> None:
+    """
+    Compare the per-row and the vectorised validation engines on synthetic sheets, and check that
+    they flag the same rows with the same messages.
+    Usage: python -m benchmarks.validation_engines [--rows 10000 100000] [--invalid-rate 0.05]
+    """
+    parser = argparse.ArgumentParser(description="Compare the per-row and vectorised validation engines")
+    parser.add_argument("--rows", type=int, nargs="+", default=VALIDATION_BENCHMARK_ROWS, help="Synthetic sheet sizes")
+    parser.add_argument("--invalid-rate", type=float, default=VALIDATION_INVALID_RATE, help="Share of invalid rows")
+    args = parser.parse_args()
+
+    # Warm-up: the vectorised engine imports pandas on first use, load it now so its import time is not timed
+    importlib.import_module("pandas")
+    for row_count in args.rows:
+        results = {}
+        for name, vectorized_validation in (("per-row", False), ("vectorized", True)):
+            rows = build_rows(row_count, args.invalid_rate)
+            started_at = time.perf_counter()
+            validated_rows = main_validate_input_data({"data": rows, "vectorized_validation": vectorized_validation})
+            seconds = time.perf_counter() - started_at
+            results[name] = [(row["validation"], row["invalid_message"]) for row in validated_rows]
+            invalid = sum(1 for valid, _ in results[name] if not valid)
+            print(f"{row_count} rows, {name}: {seconds:.3f}s ({row_count / seconds:.0f} rows/s, {invalid} invalid)")
+        identical = "identical" if results["per-row"] == results["vectorized"] else "DIFFERENT"
+        print(f"{row_count} rows: {identical} results")
+
+if __name__ == "__main__":
+    main()
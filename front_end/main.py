@@ -1,6 +1,11 @@
 import streamlit as st
 
-from back_end.automation_workflow.automation_workflow import AutomationWorkflow
+from back_end.automation_workflow.job_queue import get_job_worker_pool, FINISHED_JOB_STATUSES
+
+# Seconds between two refreshes of the job status
+JOB_STATUS_REFRESH_SECONDS = 2
+# Rows shown in the per-row status table, the counts cover every row
+JOB_STATUS_ROWS_LIMIT = 1000
 
 # Set page configuration
 st.set_page_config(
@@ -9,12 +14,12 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize the automation workflow
-if 'automation_workflow' not in st.session_state:
-    # Create instance once and store in session state
-    st.session_state.automation_workflow = AutomationWorkflow()
+# Runs are processed by background workers shared by every session
+job_queue = get_job_worker_pool().job_queue
 
-automation_workflow = st.session_state.automation_workflow
+# The submitted job is kept in the URL so a browser refresh keeps following it
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = st.query_params.get("job")
 
 # Header with description
 st.title("🤖 Automation Workflow Dashboard")
@@ -62,6 +67,8 @@ with st.container():
     )
     
     # Email input (only show if checkbox is checked)
+    generate_daily_report = False
+    email_address = ""
     if send_email_notifications:
         generate_daily_report = st.checkbox(
             "Generate Daily Report",
@@ -92,10 +99,7 @@ with st.container():
         use_container_width=True
     ):
         if is_valid:
-            # Clear previous status messages
-            status_placeholder = st.empty()
-
-            # Run the automation workflow
+            # Queue the automation workflow, a background worker runs it
             input_fields = {
                 "google_sheets_url": google_sheets_url,
                 "google_drive_folder_url": google_drive_folder,
@@ -103,39 +107,68 @@ with st.container():
                 "email_address": email_address if send_email_notifications else None,
                 "generate_daily_report": generate_daily_report,
             }
+            st.session_state.job_id = job_queue.submit(input_fields)
+            st.query_params["job"] = st.session_state.job_id
+
+    # Per-row status of a run: the counts of every row and the first JOB_STATUS_ROWS_LIMIT rows
+    def show_job_rows(job):
+        counts = job["row_counts"]
+        if not counts.get("rows"):
+            return
+        st.caption(
+            f"{counts['rows']} rows: {counts['valid']} valid, {counts['generated']} generated, "
+            f"{counts['stored']} stored, {counts['uploaded']} uploaded, {counts['reused']} reused"
+        )
+        st.dataframe(job_queue.get_rows(job["id"], JOB_STATUS_ROWS_LIMIT), use_container_width=True, hide_index=True)
+        if counts["rows"] > JOB_STATUS_ROWS_LIMIT:
+            st.caption(f"Showing the first {JOB_STATUS_ROWS_LIMIT} rows")
+
+    # Progress of a queued or running run, refreshed until it is finished
+    @st.fragment(run_every=JOB_STATUS_REFRESH_SECONDS)
+    def show_job_progress(job_id):
+        job = job_queue.get(job_id)
+        if not job or job["status"] in FINISHED_JOB_STATUSES:
+            # Rerun the whole page: the final status is shown without this timer, so polling stops
+            st.rerun()
+        st.info(f"⏳ {job['status']}: {job['message']}")
+        show_job_rows(job)
 
-            # Define simple callback to update spinner
-            def update_status(message):
-                with status_placeholder:
-                    st.info(f"⏳ {message}")
-            
-            automation_workflow.load_input_data(input_fields, update_status)
-            automation_workflow.process_main_steps()
-            automation_workflow.process_optional_steps()
+    # Status of the submitted run
+    def show_job_status(job_id):
+        job = job_queue.get(job_id)
+        if not job:
+            st.warning("⚠️ This run is no longer available")
+            return
 
+        if job["status"] not in FINISHED_JOB_STATUSES:
+            show_job_progress(job_id)
+        else:
             # Show final result of main process
-            if automation_workflow.status == "Success":
-                status_placeholder.success("✅ Processing completed successfully!")
-                
+            if job["status"] == "Success":
+                st.success("✅ Processing completed successfully!")
+
                 # Display configuration summary
                 st.info(f"""
                 **Configuration Summary:**
-                - 📊 Input: {google_sheets_url}
-                - 💾 Output: Google Drive Folder ID: {google_drive_folder}
-                - 📧 Email Notifications: {'Enabled' if send_email_notifications else 'Disabled'}
+                - 📊 Input: {job['input_fields']['google_sheets_url']}
+                - 💾 Output: Google Drive Folder ID: {job['input_fields']['google_drive_folder_url']}
+                - 📧 Email Notifications: {'Enabled' if job['input_fields']['send_email_notifications'] else 'Disabled'}
                 """)
             else:
-                status_placeholder.error(f"❌ {automation_workflow.error_message}")
-            
+                st.error(f"❌ {job['error_message']}")
+
             # Show final result of optional process
-            if automation_workflow.status_of_optional_steps == "Success":
-                status_placeholder.success("✅ Sending email notifications completed successfully!")
-            else:
-                status_placeholder.error(f"❌ {automation_workflow.error_message}")
+            if job["input_fields"]["send_email_notifications"]:
+                if job["status_of_optional_steps"] == "Success":
+                    st.success("✅ Sending email notifications completed successfully!")
+                else:
+                    st.error(f"❌ {job['error_message']}")
+
+            show_job_rows(job)
+
+    if st.session_state.job_id:
+        show_job_status(st.session_state.job_id)
 
-            # Reset resources
-            automation_workflow.reset_resources()
-            
     # Help section
     if not is_valid:
         st.markdown("---")